@@ -1,13 +1,22 @@
 import csv
-from openpyxl import Workbook
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import Font, Border, Side
-import matplotlib.pyplot as plt
-import numpy as np
-from jinja2 import Environment, FileSystemLoader
 import pathlib
-import pdfkit
+import hashlib
+import functools
 import math
+import re
+import multiprocessing
+import concurrent.futures as con_fut
+import os
+import json
+import mmap
+import operator
+import codecs
+import copy
+import itertools
+from array import array
+from render_cache import RenderCache
+from warehouse import VacancyWarehouse
+from sketches import SpaceSaving, QuantileSketch
 
 currency_to_rub = {"AZN": 35.68, "BYR": 23.91, "EUR": 59.90, "GEL": 21.74, "KGS": 0.76, "KZT": 0.13, "RUR": 1,
                    "UAH": 1.64, "USD": 60.66, "UZS": 0.0055}
@@ -24,9 +33,12 @@ class Vacancy:
 
     Attributes:
         name (str): Название вакансии
+        salary (int): Средняя зарплата в валюте вакансии
+        salary_currency (str): Валюта зарплаты
         salary_average (int): Средняя зарплата в рублях
         area_name (str): Название города
         publication_year (int): Год публикации вакансии
+        publication_month (str): Месяц публикации вакансии в формате ГГГГ-ММ
     """
 
     def __init__(self, vacancies):
@@ -36,10 +48,629 @@ class Vacancy:
             vacancies (dict): Вакансия
         """
         self.name = vacancies[name_list[0]]
-        self.salary_average = math.floor((float(vacancies[name_list[1]]) + float(vacancies[name_list[2]])) / 2) \
-                              * currency_to_rub[vacancies[name_list[3]]]
+        self.salary = math.floor((float(vacancies[name_list[1]]) + float(vacancies[name_list[2]])) / 2)
+        self.salary_currency = vacancies[name_list[3]]
+        self.salary_average = self.salary * currency_to_rub[self.salary_currency]
         self.area_name = vacancies[name_list[4]]
         self.publication_year = int(vacancies[name_list[5]][:4])
+        self.publication_month = vacancies[name_list[5]][:7]
+
+
+class Statistic:
+    """Класс для потокового накопления статистики по вакансиям.
+
+    Вместо списков всех зарплат хранит только текущие сумму и количество по каждому ключу,
+    поэтому занимаемая память не зависит от размера входного файла. Суммы ведутся точно, в целых числах
+    отдельно по каждой валюте, и переводятся в рубли только при подсчете среднего, поэтому результат
+    не зависит от порядка строк и объекты, посчитанные по частям файла, можно объединять.
+
+    Attributes:
+        vacancy_name (str): Название выбранной профессии
+        vacancy_name_bytes (bytes): Название выбранной профессии в UTF-8 для поиска в байтах названий
+        salary (dict): Суммы по валютам и количество зарплат по годам
+        salary_of_name (dict): Суммы по валютам и количество зарплат по годам для выбранной профессии
+        city (dict): Суммы по валютам и количество зарплат по городам
+        count (int): Количество обработанных вакансий
+        monthly (bool): Суммы ведутся не по валютам, а по валютам и месяцам публикации (см. get_rate_key),
+            чтобы переводить их в рубли по курсу месяца
+    """
+
+    def __init__(self, vacancy_name, monthly=False):
+        """Инициализирует пустой объект Statistic.
+
+        Args:
+            vacancy_name (str): Название выбранной профессии
+            monthly (bool): Вести суммы по валютам и месяцам публикации
+        """
+        self.vacancy_name = vacancy_name
+        self.monthly = monthly
+        self.vacancy_name_bytes = vacancy_name.encode('utf-8') if vacancy_name is not None else None
+        self.salary = {}
+        self.salary_of_name = {}
+        self.city = {}
+        self.count = 0
+
+    @staticmethod
+    def increment(dict, k, currency, salary, number=1):
+        """Добавляет зарплату к сумме и количеству зарплат за год или в городе
+
+        Args:
+            dict (dict): Словарь с суммами по валютам и количеством зарплат за год или в городе
+            k (int): Год или город вакансии, по которому идет подсчет
+            currency (str): Валюта зарплаты
+            salary (int): Средняя зарплата у вакансии или сумма зарплат нескольких вакансий в валюте
+            number (int): Количество вакансий, вошедших в salary
+        """
+        if k not in dict:
+            dict[k] = [{}, 0]
+        sums = dict[k][0]
+        sums[currency] = sums.get(currency, 0) + salary
+        dict[k][1] += number
+
+    @staticmethod
+    def get_rate_key(currency, month):
+        """Получает ключ суммы для валюты и месяца публикации: рублевые зарплаты не пересчитываются,
+        поэтому для них месяц не нужен
+
+        Args:
+            currency (str): Валюта зарплаты
+            month (str): Месяц публикации в формате ГГГГ-ММ
+        Returns:
+            str: Ключ суммы, например "USD 2003-01"
+        """
+        return currency if currency == 'RUR' else currency + ' ' + month
+
+    @staticmethod
+    def get_total(sums, rates=None):
+        """Переводит суммы зарплат по валютам в общую сумму в рублях.
+
+        С таблицей курсов суммы с ключами get_rate_key переводятся по курсу своего месяца; суммы валют и месяцев,
+        которых нет в таблице, и суммы без месяца переводятся по курсам currency_to_rub
+
+        Args:
+            sums (dict): Суммы зарплат по валютам или по валютам и месяцам
+            rates (CurrencyRates): Таблица курсов валют по месяцам
+        Returns:
+            float: Сумма зарплат в рублях
+        """
+        if rates is None:
+            return sum(sums[currency] * rate for currency, rate in currency_to_rub.items() if currency in sums)
+        total = 0
+        for key in sorted(sums):
+            currency, _, month = key.partition(' ')
+            rate = rates.get_rate(currency, month) if month else None
+            total += sums[key] * (currency_to_rub[currency] if rate is None else rate)
+        return total
+
+    def add(self, vacancy):
+        """Учитывает вакансию в статистике
+
+        Args:
+            vacancy (Vacancy): Вакансия
+        """
+        currency = vacancy.salary_currency if not self.monthly \
+            else self.get_rate_key(vacancy.salary_currency, vacancy.publication_month)
+        self.add_salary(self.get_matches(vacancy.name), vacancy.publication_year, currency, vacancy.salary,
+                        vacancy.area_name)
+
+    def get_matches(self, name):
+        """Получает профессии, которые встречаются в названии вакансии
+
+        Args:
+            name (str or bytes): Название вакансии, строкой или байтами UTF-8
+        Returns:
+            tuple: Выбранная профессия или пустой кортеж
+        """
+        if name.find(self.vacancy_name if isinstance(name, str) else self.vacancy_name_bytes) != -1:
+            return self.vacancy_name,
+        return ()
+
+    def get_salary_of_name(self, vacancy_name):
+        """Получает словарь зарплат по годам для профессии
+
+        Args:
+            vacancy_name (str): Название профессии
+        Returns:
+            dict: Суммы по валютам и количество зарплат по годам для профессии
+        """
+        return self.salary_of_name
+
+    def add_salary(self, matches, publication_year, salary_currency, salary, area_name, number=1):
+        """Учитывает в статистике одну или несколько вакансий с одинаковыми годом, валютой, городом
+        и совпавшими профессиями
+
+        Args:
+            matches (tuple): Профессии, найденные в названии, результат get_matches
+            publication_year (int): Год публикации вакансии
+            salary_currency (str): Валюта зарплаты
+            salary (int): Средняя зарплата в валюте вакансии или сумма зарплат нескольких вакансий
+            area_name (str): Название города
+            number (int): Количество вакансий, вошедших в salary
+        """
+        self.increment(self.salary, publication_year, salary_currency, salary, number)
+        for vacancy_name in matches:
+            self.increment(self.get_salary_of_name(vacancy_name), publication_year, salary_currency, salary, number)
+        self.increment(self.city, area_name, salary_currency, salary, number)
+        self.count += number
+
+    def merge(self, other):
+        """Добавляет к статистике статистику, посчитанную по другой части файла
+
+        Args:
+            other (Statistic): Статистика по другой части файла
+        """
+        for dict, other_dict in ((self.salary, other.salary), (self.salary_of_name, other.salary_of_name),
+                                 (self.city, other.city)):
+            self.merge_dict(dict, other_dict)
+        self.count += other.count
+
+    @staticmethod
+    def merge_dict(dict, other_dict):
+        """Добавляет суммы и количества зарплат одного словаря к другому
+
+        Args:
+            dict (dict): Словарь, который дополняется
+            other_dict (dict): Добавляемый словарь
+        """
+        for k, (sums, number) in other_dict.items():
+            for currency, salary in sums.items():
+                Statistic.increment(dict, k, currency, salary, 0)
+            dict[k][1] += number
+
+    def to_dict(self):
+        """Переводит статистику в словарь для сохранения в json
+
+        Returns:
+            dict: Статистика в виде словаря
+        """
+        return {'vacancy_name': self.vacancy_name, 'count': self.count, 'monthly': self.monthly,
+                'salary': [[k, sums, number] for k, (sums, number) in self.salary.items()],
+                'salary_of_name': [[k, sums, number] for k, (sums, number) in self.salary_of_name.items()],
+                'city': [[k, sums, number] for k, (sums, number) in self.city.items()]}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Восстанавливает статистику из словаря, полученного методом to_dict
+
+        Args:
+            data (dict): Статистика в виде словаря
+        Returns:
+            Statistic: Восстановленная статистика
+        """
+        statistic = cls(data['vacancy_name'], data.get('monthly', False))
+        statistic.count = data['count']
+        for dict, items in ((statistic.salary, data['salary']), (statistic.salary_of_name, data['salary_of_name']),
+                            (statistic.city, data['city'])):
+            for k, sums, number in items:
+                dict[k] = [sums, number]
+        return statistic
+
+
+class ProfessionsStatistic(Statistic):
+    """Класс для накопления статистики сразу по нескольким профессиям за один проход по файлу.
+
+    Название вакансии сначала проверяется одним скомпилированным регулярным выражением-альтернативой
+    всех профессий, и только совпавшие названия проверяются по каждой профессии. Результат для названия
+    запоминается, поэтому повторяющиеся названия вакансий проверяются один раз.
+
+    Attributes:
+        vacancy_names (list): Названия профессий
+        salary_of_names (dict): Суммы по валютам и количество зарплат по годам для каждой профессии
+        pattern (Pattern): Регулярное выражение, совпадающее с любой из профессий
+        matches (dict): Профессии, найденные в уже встречавшихся названиях вакансий
+    """
+
+    max_matches = 1000000
+
+    def __init__(self, vacancy_names, monthly=False):
+        """Инициализирует пустой объект ProfessionsStatistic.
+
+        Args:
+            vacancy_names (list): Названия профессий
+            monthly (bool): Вести суммы по валютам и месяцам публикации
+        """
+        super().__init__(None, monthly)
+        self.vacancy_names = list(vacancy_names)
+        self.salary_of_names = {name: {} for name in self.vacancy_names}
+        self.pattern = re.compile('|'.join(map(re.escape, self.vacancy_names)))
+        self.matches = {}
+
+    def __getstate__(self):
+        """Не передает в другие процессы запомненные совпадения
+
+        Returns:
+            dict: Состояние объекта
+        """
+        return {**self.__dict__, 'matches': {}}
+
+    def get_matches(self, name):
+        """Получает профессии, которые встречаются в названии вакансии
+
+        Args:
+            name (str or bytes): Название вакансии, строкой или байтами UTF-8
+        Returns:
+            tuple: Совпавшие профессии
+        """
+        matches = self.matches.get(name)
+        if matches is None:
+            text = name if isinstance(name, str) else name.decode('utf-8')
+            matches = () if self.pattern.search(text) is None \
+                else tuple(vacancy_name for vacancy_name in self.vacancy_names if vacancy_name in text)
+            if len(self.matches) >= self.max_matches:
+                self.matches.clear()
+            self.matches[name] = matches
+        return matches
+
+    def get_salary_of_name(self, vacancy_name):
+        """Получает словарь зарплат по годам для профессии
+
+        Args:
+            vacancy_name (str): Название профессии
+        Returns:
+            dict: Суммы по валютам и количество зарплат по годам для профессии
+        """
+        return self.salary_of_names[vacancy_name]
+
+    def merge(self, other):
+        """Добавляет к статистике статистику, посчитанную по другой части файла
+
+        Args:
+            other (ProfessionsStatistic): Статистика по другой части файла
+        """
+        super().merge(other)
+        for vacancy_name, salary_of_name in other.salary_of_names.items():
+            self.merge_dict(self.salary_of_names[vacancy_name], salary_of_name)
+
+    def get_statistic(self, vacancy_name):
+        """Получает статистику по одной профессии
+
+        Args:
+            vacancy_name (str): Название профессии
+        Returns:
+            Statistic: Статистика, в которой salary_of_name относится к выбранной профессии
+        """
+        statistic = Statistic(vacancy_name, self.monthly)
+        statistic.salary, statistic.city, statistic.count = self.salary, self.city, self.count
+        statistic.salary_of_name = self.salary_of_names[vacancy_name]
+        return statistic
+
+
+class SketchStatistic(Statistic):
+    """Класс для накопления статистики скетчами фиксированного размера, в том числе медиан и перцентилей зарплат.
+
+    Суммы по годам ведутся точно, как в Statistic, так как лет немного. Города, которых в потоке может быть
+    сколько угодно, считаются SpaceSaving: отслеживаются только самые частые, а суммы зарплат и скетч
+    зарплат города ведутся с момента, когда город начал отслеживаться. Зарплаты каждого года, каждого года
+    выбранной профессии и каждого отслеживаемого города добавляются в QuantileSketch уже в рублях: по курсу
+    месяца публикации, если задана таблица курсов, иначе по курсам currency_to_rub. Скетчи объединяются, поэтому
+    статистику можно считать по частям файла в процессах пула.
+
+    Attributes:
+        rates (CurrencyRates): Таблица курсов валют по месяцам для перевода зарплат в скетчах
+        k (int): Точность скетчей зарплат, см. QuantileSketch
+        cities (SpaceSaving): Города с данными [суммы по валютам, количество зарплат, QuantileSketch]
+        salary_quantiles (dict): Скетчи зарплат по годам
+        salary_of_name_quantiles (dict): Скетчи зарплат по годам для выбранной профессии
+    """
+
+    def __init__(self, vacancy_name, monthly=False, rates=None, capacity=200, k=200):
+        """Инициализирует пустой объект SketchStatistic.
+
+        Args:
+            vacancy_name (str): Название выбранной профессии
+            monthly (bool): Вести суммы по валютам и месяцам публикации
+            rates (CurrencyRates): Таблица курсов валют по месяцам
+            capacity (int): Количество гарантированно отслеживаемых городов
+            k (int): Точность скетчей зарплат
+        """
+        super().__init__(vacancy_name, monthly)
+        self.rates = rates
+        self.k = k
+        self.cities = SpaceSaving(capacity, functools.partial(self.new_city, k))
+        self.salary_quantiles = {}
+        self.salary_of_name_quantiles = {}
+
+    @staticmethod
+    def new_city(k):
+        """Создает данные нового отслеживаемого города
+
+        Args:
+            k (int): Точность скетча зарплат
+        Returns:
+            list: Суммы по валютам, количество зарплат и скетч зарплат
+        """
+        return [{}, 0, QuantileSketch(k)]
+
+    @staticmethod
+    def merge_city(city, other_city):
+        """Добавляет данные города, посчитанные по другой части файла
+
+        Args:
+            city (list): Данные города, которые дополняются
+            other_city (list): Добавляемые данные города
+        """
+        for currency, salary in other_city[0].items():
+            city[0][currency] = city[0].get(currency, 0) + salary
+        city[1] += other_city[1]
+        city[2].merge(other_city[2])
+
+    def add_quantile(self, dict, k, value):
+        """Добавляет зарплату в скетч года
+
+        Args:
+            dict (dict): Скетчи по годам
+            k (int): Год
+            value (float): Зарплата в рублях
+        """
+        if k not in dict:
+            dict[k] = QuantileSketch(self.k)
+        dict[k].add(value)
+
+    def add_salary(self, matches, publication_year, salary_currency, salary, area_name, number=1):
+        """Учитывает в статистике вакансию
+
+        Args:
+            matches (tuple): Профессии, найденные в названии, результат get_matches
+            publication_year (int): Год публикации вакансии
+            salary_currency (str): Валюта зарплаты, с таблицей курсов - ключ get_rate_key
+            salary (int): Средняя зарплата в валюте вакансии
+            area_name (str): Название города
+            number (int): Количество вакансий, в скетчах всегда одна
+        """
+        value = self.get_total({salary_currency: salary}, self.rates)
+        self.increment(self.salary, publication_year, salary_currency, salary, number)
+        self.add_quantile(self.salary_quantiles, publication_year, value)
+        for _ in matches:
+            self.increment(self.salary_of_name, publication_year, salary_currency, salary, number)
+            self.add_quantile(self.salary_of_name_quantiles, publication_year, value)
+        city = self.cities.add(area_name, number)
+        city[0][salary_currency] = city[0].get(salary_currency, 0) + salary
+        city[1] += number
+        city[2].add(value)
+        self.count += number
+
+    def merge(self, other):
+        """Добавляет к статистике статистику, посчитанную по другой части файла
+
+        Args:
+            other (SketchStatistic): Статистика по другой части файла
+        """
+        super().merge(other)
+        for dict, other_dict in ((self.salary_quantiles, other.salary_quantiles),
+                                 (self.salary_of_name_quantiles, other.salary_of_name_quantiles)):
+            for k, sketch in other_dict.items():
+                if k in dict:
+                    dict[k].merge(sketch)
+                else:
+                    dict[k] = sketch
+        self.cities.merge(other.cities, self.merge_city)
+
+    def get_statistic(self):
+        """Получает статистику с суммами по отслеживаемым городам для build_dynamics
+
+        Returns:
+            Statistic: Статистика, в которой city - отслеживаемые города
+        """
+        statistic = Statistic(self.vacancy_name, self.monthly)
+        statistic.salary, statistic.salary_of_name, statistic.count = self.salary, self.salary_of_name, self.count
+        statistic.city = dict([(area_name, city[:2]) for area_name, _, city in self.cities.items()])
+        return statistic
+
+
+class NameIndex:
+    """Класс постоянного триграммного индекса по названиям вакансий.
+
+    Индекс хранится в папке рядом с входным файлом в виде файлов .npy, которые открываются отображением
+    в память. В нем лежат: уникальные названия вакансий, для каждой триграммы - отсортированный список
+    названий, в которых она встречается, и колонки год, валюта, зарплата и номер строки, упорядоченные
+    по названию. Запрос по профессии пересекает списки триграмм, проверяет только найденные названия
+    и суммирует зарплаты их строк, не трогая остальные строки. Статистика по всем вакансиям посчитана
+    при построении и хранится в meta.json.
+
+    Attributes:
+        path (str): Папка индекса
+        meta (dict): Версия исходного файла, валюты, минимальный год и статистика по всем вакансиям
+        arrays (dict): Массивы индекса
+    """
+
+    array_names = ['title_bytes', 'title_offsets', 'trigrams', 'trigram_offsets', 'trigram_titles',
+                   'row_offsets', 'row_year', 'row_currency', 'row_salary', 'row_number']
+
+    def __init__(self, path):
+        """Открывает построенный индекс.
+
+        Args:
+            path (str): Папка индекса
+        """
+        import numpy as np
+
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), mode='r', encoding='utf-8') as file:
+            self.meta = json.load(file)
+        self.arrays = dict([(name, np.load(os.path.join(path, name + '.npy'), mmap_mode='r'))
+                            for name in self.array_names])
+
+    @staticmethod
+    def get_trigrams(name):
+        """Получает коды всех триграмм строки, три символа упаковываются в одно целое число
+
+        Args:
+            name (str): Строка
+        Returns:
+            set: Коды триграмм
+        """
+        codes = [ord(c) for c in name]
+        return set((codes[i] << 42) | (codes[i + 1] << 21) | codes[i + 2] for i in range(len(codes) - 2))
+
+    @staticmethod
+    def get_version(filename):
+        """Получает размер и время изменения входного файла, по которым проверяется актуальность индекса
+
+        Args:
+            filename (str): Название файла с данными о вакансиях
+        Returns:
+            list: Размер и время изменения файла
+        """
+        stat = os.stat(filename)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    @classmethod
+    def open(cls, filename):
+        """Открывает индекс входного файла, при отсутствии или устаревании строит его заново
+
+        Args:
+            filename (str): Название файла с данными о вакансиях
+        Returns:
+            NameIndex: Индекс по названиям вакансий
+        """
+        path = filename + '.index'
+        if os.path.exists(os.path.join(path, 'meta.json')):
+            index = cls(path)
+            if index.meta['version'] == cls.get_version(filename):
+                return index
+        return cls.build(filename, path)
+
+    @classmethod
+    def build(cls, filename, path):
+        """Строит индекс за один проход по входному файлу
+
+        Args:
+            filename (str): Название файла с данными о вакансиях
+            path (str): Папка индекса
+        Returns:
+            NameIndex: Построенный индекс
+        """
+        import numpy as np
+
+        version = cls.get_version(filename)
+        statistic = Statistic('')
+        titles, currencies = {}, dict([(currency, i) for i, currency in enumerate(currency_to_rub)])
+        row_title, row_year, row_currency, row_salary = array('q'), array('q'), array('b'), array('q')
+        for vacancy_dictionary in DataSet(filename, '').csv_reader():
+            vacancy = Vacancy(vacancy_dictionary)
+            statistic.increment(statistic.salary, vacancy.publication_year, vacancy.salary_currency, vacancy.salary)
+            statistic.increment(statistic.city, vacancy.area_name, vacancy.salary_currency, vacancy.salary)
+            statistic.count += 1
+            row_title.append(titles.setdefault(vacancy.name, len(titles)))
+            row_year.append(vacancy.publication_year)
+            row_currency.append(currencies[vacancy.salary_currency])
+            row_salary.append(vacancy.salary)
+
+        row_title = np.frombuffer(row_title, dtype=np.int64)
+        order = np.argsort(row_title, kind='stable')
+        min_year = min(statistic.salary) if statistic.salary else 0
+        encoded = [title.encode('utf-8') for title in titles]
+        trigram_pairs = [(code, title_id) for title_id, title in enumerate(titles) for code in cls.get_trigrams(title)]
+        pairs = np.array(trigram_pairs, dtype=np.int64).reshape(-1, 2)
+        pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+        trigrams, trigram_starts = np.unique(pairs[:, 0], return_index=True)
+
+        arrays = {'title_bytes': np.frombuffer(b''.join(encoded), dtype=np.uint8),
+                  'title_offsets': np.concatenate([[0], np.cumsum([len(title) for title in encoded])]).astype(np.int64),
+                  'trigrams': trigrams,
+                  'trigram_offsets': np.append(trigram_starts, len(pairs)).astype(np.int64),
+                  'trigram_titles': pairs[:, 1].copy(),
+                  'row_offsets': np.concatenate([[0], np.cumsum(np.bincount(row_title, minlength=len(titles)))])
+                  .astype(np.int64),
+                  'row_year': (np.frombuffer(row_year, dtype=np.int64)[order] - min_year).astype(np.int16),
+                  'row_currency': np.frombuffer(row_currency, dtype=np.int8)[order],
+                  'row_salary': np.frombuffer(row_salary, dtype=np.int64)[order],
+                  'row_number': order.astype(np.int64)}
+        os.makedirs(path, exist_ok=True)
+        for name in cls.array_names:
+            np.save(os.path.join(path, name + '.npy'), arrays[name])
+        with open(os.path.join(path, 'meta.json'), mode='w', encoding='utf-8') as file:
+            json.dump({'version': version, 'currencies': list(currencies), 'min_year': min_year,
+                       'statistic': statistic.to_dict()}, file, ensure_ascii=False)
+        return cls(path)
+
+    def get_title(self, title_id):
+        """Получает название вакансии по его номеру
+
+        Args:
+            title_id (int): Номер названия
+        Returns:
+            str: Название вакансии
+        """
+        offsets = self.arrays['title_offsets']
+        return bytes(self.arrays['title_bytes'][offsets[title_id]:offsets[title_id + 1]]).decode('utf-8')
+
+    def find_titles(self, vacancy_name):
+        """Находит номера всех названий, в которых встречается профессия
+
+        Args:
+            vacancy_name (str): Название профессии
+        Returns:
+            ndarray: Номера названий
+        """
+        import numpy as np
+
+        candidates = None
+        for code in self.get_trigrams(vacancy_name):
+            position = np.searchsorted(self.arrays['trigrams'], code)
+            if position == len(self.arrays['trigrams']) or self.arrays['trigrams'][position] != code:
+                return np.array([], dtype=np.int64)
+            offsets = self.arrays['trigram_offsets']
+            posting = self.arrays['trigram_titles'][offsets[position]:offsets[position + 1]]
+            candidates = posting if candidates is None else np.intersect1d(candidates, posting, assume_unique=True)
+        if candidates is None:
+            return self.scan_titles(vacancy_name)
+        return np.array([title_id for title_id in candidates.tolist() if vacancy_name in self.get_title(title_id)],
+                        dtype=np.int64)
+
+    def scan_titles(self, vacancy_name):
+        """Находит названия для профессии короче трех символов поиском по всем названиям подряд.
+        Названия хранятся одной строкой байтов utf-8, найденные позиции переводятся в номера названий
+
+        Args:
+            vacancy_name (str): Название профессии
+        Returns:
+            ndarray: Номера названий
+        """
+        import numpy as np
+
+        offsets = self.arrays['title_offsets']
+        if not vacancy_name:
+            return np.arange(len(offsets) - 1)
+        needle, buffer, positions = vacancy_name.encode('utf-8'), self.arrays['title_bytes'].tobytes(), []
+        position = buffer.find(needle)
+        while position != -1:
+            positions.append(position)
+            position = buffer.find(needle, position + 1)
+        positions = np.array(positions, dtype=np.int64)
+        title_ids = np.searchsorted(offsets, positions, side='right') - 1
+        return np.unique(title_ids[positions + len(needle) <= offsets[title_ids + 1]])
+
+    def get_statistic(self, vacancy_name):
+        """Получает статистику по выбранной профессии, суммируя только строки найденных названий
+
+        Args:
+            vacancy_name (str): Название выбранной профессии
+        Returns:
+            Statistic: Статистика по всем вакансиям и по выбранной профессии
+        """
+        import numpy as np
+
+        statistic = Statistic.from_dict(self.meta['statistic'])
+        statistic.vacancy_name = vacancy_name
+        title_ids = self.find_titles(vacancy_name)
+        starts = self.arrays['row_offsets'][title_ids]
+        lengths = self.arrays['row_offsets'][title_ids + 1] - starts
+        rows = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        if not len(rows):
+            return statistic
+
+        currencies = self.meta['currencies']
+        keys = self.arrays['row_year'][rows].astype(np.int64) * len(currencies) + self.arrays['row_currency'][rows]
+        sums = np.bincount(keys, weights=self.arrays['row_salary'][rows])
+        numbers = np.bincount(keys)
+        first_rows = np.full(len(numbers), np.iinfo(np.int64).max)
+        np.minimum.at(first_rows, keys, self.arrays['row_number'][rows])
+        for key in np.nonzero(numbers)[0][np.argsort(first_rows[np.nonzero(numbers)[0]], kind='stable')]:
+            year, currency = divmod(int(key), len(currencies))
+            statistic.increment(statistic.salary_of_name, year + self.meta['min_year'], currencies[currency],
+                                int(sums[key]), int(numbers[key]))
+        return statistic
 
 
 class DataSet:
@@ -48,16 +679,39 @@ class DataSet:
     Attributes:
         filename (str): Название файла с данными о вакансиях
         vacancy_name (str): Название выбранной профессии
+        rates (CurrencyRates): Таблица курсов валют по месяцам; если задана, зарплаты переводятся в рубли
+            по курсу месяца публикации, иначе по курсам currency_to_rub
+        sketched (bool): Считать города и квантили зарплат скетчами фиксированного размера (SketchStatistic)
     """
 
-    def __init__(self, filename, vacancy_name):
+    max_matches = 100000
+
+    def __init__(self, filename, vacancy_name, rates=None, sketched=False):
         """Инициализирует объект DataSet.
 
         Args:
             filename (str): Название файла с данными о вакансиях
             vacancy_name (str): Название выбранной профессии
+            rates (CurrencyRates): Таблица курсов валют по месяцам
+            sketched (bool): Считать города и квантили зарплат скетчами фиксированного размера
+        """
+        self.filename, self.vacancy_name, self.rates, self.sketched = filename, vacancy_name, rates, sketched
+
+    def new_statistic(self, vacancy_names=None):
+        """Создает пустую статистику по выбранной профессии или по нескольким профессиям. С таблицей курсов
+        суммы ведутся по валютам и месяцам, а переводятся в рубли только при получении динамик
+
+        Args:
+            vacancy_names (list): Названия нескольких профессий, которые считаются вместо выбранной
+        Returns:
+            Statistic: Пустая статистика
         """
-        self.filename, self.vacancy_name = filename, vacancy_name
+        monthly = self.rates is not None
+        if vacancy_names is None:
+            if self.sketched:
+                return SketchStatistic(self.vacancy_name, monthly, self.rates)
+            return Statistic(self.vacancy_name, monthly)
+        return ProfessionsStatistic(vacancy_names, monthly)
 
     def csv_reader(self):
         """Считывает данные из входного файла
@@ -73,65 +727,476 @@ class DataSet:
                 if '' not in row and len(row) == header_length:
                     yield dict(zip(header, row))
 
+    def get_shards(self, number):
+        """Делит входной файл на байтовые диапазоны, каждый из которых начинается с начала строки.
+
+        Поля со встроенными переводами строк не поддерживаются: граница может попасть внутрь такого поля.
+
+        Args:
+            number (int): Желаемое количество диапазонов
+        Returns:
+            list, list: Заголовок файла и список диапазонов (начало, конец)
+        """
+        size = os.path.getsize(self.filename)
+        with open(self.filename, mode='rb') as file:
+            header = next(csv.reader([file.readline().decode('utf-8-sig')]))
+            bounds = [file.tell()]
+            for i in range(1, number):
+                position = max(bounds[0] + (size - bounds[0]) * i // number, bounds[-1])
+                file.seek(position - 1)
+                file.readline()
+                bounds.append(min(file.tell(), size))
+            bounds.append(size)
+        shards = [(start, end) for start, end in zip(bounds, bounds[1:]) if start < end]
+        return header, shards
+
+    def shard_reader(self, header, start, end):
+        """Считывает данные из байтового диапазона входного файла
+
+        Args:
+            header (list): Заголовок файла
+            start (int): Начало диапазона, начало строки
+            end (int): Конец диапазона
+        Returns:
+            dict: Вакансии диапазона с информацией о них.
+        """
+        def lines():
+            with open(self.filename, mode='rb') as file:
+                file.seek(start)
+                position = start
+                while position < end:
+                    line = file.readline()
+                    if not line:
+                        break
+                    position += len(line)
+                    yield line.decode('utf-8')
+
+        header_length = len(header)
+        for row in csv.reader(lines()):
+            if '' not in row and len(row) == header_length:
+                yield dict(zip(header, row))
+
+    @staticmethod
+    def get_row_end(data, position, end):
+        """Находит конец строки, учитывая переводы строк внутри полей в кавычках
+
+        Args:
+            data (mmap): Отображенный в память файл
+            position (int): Начало строки
+            end (int): Конец области чтения
+        Returns:
+            int: Смещение сразу после строки
+        """
+        row_end = data.find(b'\n', position, end)
+        while row_end != -1 and data[position:row_end].count(b'"') % 2:
+            row_end = data.find(b'\n', row_end + 1, end)
+        return end if row_end == -1 else row_end + 1
+
+    def get_statistic_by_mmap(self, vacancy_names=None, start=None, end=None, block_size=1 << 23):
+        """Считает статистику, отображая файл в память и разбирая строки прямо в байтах.
+
+        Файл делится на строки и поля методом split блоками по block_size байт. Название сравнивается
+        с профессией в байтах, зарплаты переводятся в числа из байтов, а зарплаты с одинаковыми годом, валютой,
+        городом и совпавшими профессиями сразу складываются. Год, валюта и город декодируются один раз на такую
+        группу, а группы добавляются в статистику в порядке первого появления, как при построчном чтении.
+        Только строки с кавычками декодируются и разбираются csv.reader; строки с пустыми полями или неверным
+        количеством полей пропускаются, как в csv_reader. С таблицей курсов группы ведутся не по году,
+        а по месяцу публикации.
+
+        Args:
+            vacancy_names (list): Названия нескольких профессий, которые считаются вместо выбранной
+            start (int): Начало области чтения, начало строки; по умолчанию сразу после заголовка
+            end (int): Конец области чтения; по умолчанию конец файла
+            block_size (int): Размер блока в байтах
+        Returns:
+            Statistic: Накопленная статистика по вакансиям
+        """
+        statistic = self.new_statistic(vacancy_names)
+        if os.path.getsize(self.filename) == 0:
+            return statistic
+        totals, matches = {}, {}
+        date_length = 7 if statistic.monthly else 4
+        with open(self.filename, mode='rb') as file, \
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            bom = len(codecs.BOM_UTF8) if data[:len(codecs.BOM_UTF8)] == codecs.BOM_UTF8 else 0
+            header_end = self.get_row_end(data, bom, len(data))
+            header = next(csv.reader([data[bom:header_end].decode('utf-8')]), [])
+            header_length = len(header)
+            get_fields = operator.itemgetter(*[header.index(column) for column in name_list])
+
+            def add(fields):
+                name, salary_from, salary_to, currency, area, published_at = get_fields(fields)
+                name_matches = matches.get(name)
+                if name_matches is None:
+                    if len(matches) >= self.max_matches:
+                        matches.clear()
+                    name_matches = matches[name] = statistic.get_matches(name)
+                key = (published_at[:date_length], currency, area, name_matches)
+                salary = math.floor((float(salary_from) + float(salary_to)) / 2)
+                total = totals.get(key)
+                if total is None:
+                    totals[key] = [salary, 1]
+                else:
+                    total[0] += salary
+                    total[1] += 1
+
+            def add_quoted(text):
+                fields = next(csv.reader(text.decode('utf-8').splitlines(True)), [])
+                if '' not in fields and len(fields) == header_length:
+                    add([field.encode('utf-8') for field in fields])
+
+            position = header_end if start is None else start
+            end = len(data) if end is None else end
+            while position < end:
+                block_end = min(position + block_size, end)
+                if block_end < end:
+                    block_end = data.rfind(b'\n', position, block_end) + 1 or self.get_row_end(data, position, end)
+                block = data[position:block_end]
+                if b'\r' in block:
+                    block = block.replace(b'\r\n', b'\n')
+                lines = block.split(b'\n')
+                if lines[-1] == b'':
+                    lines.pop()
+                next_position = block_end
+
+                rows = enumerate(lines)
+                for first, line in rows:
+                    if b'"' in line:
+                        while line.count(b'"') % 2:
+                            _, rest = next(rows, (None, None))
+                            if rest is None:
+                                break
+                            line += b'\n' + rest
+                        if line.count(b'"') % 2:
+                            next_position = position + sum(len(text) + 1 for text in
+                                                           data[position:block_end].split(b'\n')[:first])
+                            break
+                        add_quoted(line)
+                        continue
+                    fields = line.split(b',')
+                    if b'' not in fields and len(fields) == header_length:
+                        add(fields)
+
+                if next_position != block_end:
+                    row_end = self.get_row_end(data, next_position, end)
+                    add_quoted(data[next_position:row_end])
+                    next_position = row_end
+                position = next_position
+
+        for (date, currency, area, matches), (salary, number) in totals.items():
+            currency = currency.decode('utf-8')
+            if currency not in currency_to_rub:
+                raise KeyError(currency)
+            if statistic.monthly:
+                currency = statistic.get_rate_key(currency, date.decode('utf-8'))
+            statistic.add_salary(matches, int(date[:4]), currency, salary, area.decode('utf-8'), number)
+        return statistic
+
+    def get_rows_end(self):
+        """Находит конец последней полностью записанной строки файла, чтобы не учитывать строку,
+        которая еще дописывается
+
+        Returns:
+            int: Смещение в байтах сразу после последнего перевода строки
+        """
+        with open(self.filename, mode='rb') as file:
+            position = os.path.getsize(self.filename)
+            while position > 0:
+                start = max(0, position - 65536)
+                file.seek(start)
+                index = file.read(position - start).rfind(b'\n')
+                if index != -1:
+                    return start + index + 1
+                position = start
+        return 0
+
     @staticmethod
-    def average(dict):
+    def average(dict, rates=None):
         """Высчитывает среднее значение.
 
         Args:
-            dict (dict): Словарь с значениями
+            dict (dict): Словарь с суммами и количествами значений
+            rates (CurrencyRates): Таблица курсов валют по месяцам
         Returns:
             dict: Словарь с обновленными, средними значениями
         """
         new_dict = {}
-        for k, v in dict.items():
-            new_dict[k] = int(sum(v) / len(v))
+        for k, (sums, number) in dict.items():
+            new_dict[k] = int(Statistic.get_total(sums, rates) / number)
         return new_dict
 
-    @staticmethod
-    def increment(dict, k, с):
-        """Дополняет словарь всех средних зарплат за год или в городе
+    def get_statistic(self, vacancies=None, vacancy_names=None):
+        """Потоково считывает вакансии и накапливает по ним суммы и количества зарплат
 
         Args:
-            dict (dict): Словарь со всеми зарплатами за год или в городе по вакансии
-            k (int): Год или город вакансии, по которому идет подсчет
-            с (list): Средняя зарплата у вакансии
+            vacancies (iterable): Вакансии для подсчета, по умолчанию все вакансии файла
+            vacancy_names (list): Названия нескольких профессий, которые считаются вместо выбранной
+        Returns:
+            Statistic: Накопленная статистика по вакансиям
+        """
+        statistic = self.new_statistic(vacancy_names)
+        for vacancy_dictionary in self.csv_reader() if vacancies is None else vacancies:
+            statistic.add(Vacancy(vacancy_dictionary))
+        return statistic
+
+    def get_statistic_by_shards(self, processes=None, vacancy_names=None, by_mmap=False):
+        """Делит файл на диапазоны, считает статистику по каждому из них в пуле процессов
+        и объединяет результаты в порядке диапазонов
+
+        Args:
+            processes (int): Количество процессов, по умолчанию количество ядер
+            vacancy_names (list): Названия нескольких профессий, которые считаются вместо выбранной
+            by_mmap (bool): Разбирать диапазоны в байтах отображенного в память файла
+        Returns:
+            Statistic: Накопленная статистика по всем вакансиям файла
         """
-        if k in dict:
-            dict[k] += с
+        processes = processes or os.cpu_count()
+        header, shards = self.get_shards(processes * 4)
+        with multiprocessing.Pool(processes) as pool:
+            result = pool.starmap(get_shard_statistic, [(self.filename, self.vacancy_name, header, start, end,
+                                                         vacancy_names, by_mmap, self.rates, self.sketched)
+                                                        for start, end in shards])
+
+        statistic = self.new_statistic(vacancy_names)
+        for shard_statistic in result:
+            statistic.merge(shard_statistic)
+        return statistic
+
+    def get_statistic_incremental(self, store_path=None):
+        """Дополняет сохраненную на диске статистику только строками, дописанными в файл с прошлого запуска.
+
+        Хранилище - json-файл со статистикой по каждой профессии и отметкой, до какого байта файл уже учтен.
+        Если файл был перезаписан (изменился заголовок, файл стал короче отметки или изменились байты перед ней),
+        статистика считается заново. Статистика по месяцам для перевода по таблице курсов хранится отдельно.
+
+        Args:
+            store_path (str): Путь к хранилищу, по умолчанию рядом с входным файлом
+        Returns:
+            Statistic: Накопленная статистика по всем вакансиям файла
+        """
+        store_path = store_path or self.filename + ('.stats.json' if self.rates is None else '.monthly.stats.json')
+        store = {}
+        if os.path.exists(store_path):
+            with open(store_path, mode='r', encoding='utf-8') as file:
+                store = json.load(file)
+
+        header, shards = self.get_shards(1)
+        end = max(self.get_rows_end(), shards[0][0] if shards else 0)
+        checkpoint = store.get(self.vacancy_name)
+        if checkpoint is not None and checkpoint['header'] == header and checkpoint['offset'] <= end \
+                and self.get_tail(checkpoint['offset']) == checkpoint['tail']:
+            statistic, offset = Statistic.from_dict(checkpoint['statistic']), checkpoint['offset']
         else:
-            dict[k] = с
+            statistic, offset = self.new_statistic(), shards[0][0] if shards else end
+
+        if offset < end:
+            statistic.merge(self.get_statistic(self.shard_reader(header, offset, end)))
+        store[self.vacancy_name] = {'header': header, 'offset': end, 'tail': self.get_tail(end),
+                                    'statistic': statistic.to_dict()}
+        with open(store_path + '.tmp', mode='w', encoding='utf-8') as file:
+            json.dump(store, file, ensure_ascii=False)
+        os.replace(store_path + '.tmp', store_path)
+        return statistic
+
+    def get_tail(self, offset, length=64):
+        """Получает байты перед отметкой, по которым проверяется, что уже учтенная часть файла не изменилась
 
-    def get_dynamics(self):
+        Args:
+            offset (int): Отметка в байтах
+            length (int): Количество байтов
+        Returns:
+            str: Байты перед отметкой в шестнадцатеричном виде
+        """
+        with open(self.filename, mode='rb') as file:
+            file.seek(max(0, offset - length))
+            return file.read(min(offset, length)).hex()
+
+    def get_statistic_by_warehouse(self, vacancy_names=None):
+        """Получает статистику запросами GROUP BY к хранилищу вакансий в sqlite3. При первом запросе
+        и после изменения входного файла файл загружается в хранилище заново. Хранилище общее с 3.2.3.py,
+        поэтому вакансии с любыми валютами в нем остаются, а неизвестная валюта, как и в Vacancy, вызывает KeyError
+
+        Args:
+            vacancy_names (list): Названия нескольких профессий, которые считаются вместо выбранной
+        Returns:
+            Statistic: Накопленная статистика по всем вакансиям файла
+        """
+        statistic = self.new_statistic(vacancy_names)
+        names = [self.vacancy_name] if vacancy_names is None else statistic.vacancy_names
+        groups = [(statistic.salary, 'year', None), (statistic.city, 'area', None)] + \
+                 [(statistic.get_salary_of_name(vacancy_name), 'year', vacancy_name) for vacancy_name in names]
+        with VacancyWarehouse.open(self.filename) as warehouse:
+            for dict, group, vacancy_name in groups:
+                for k, currency, month, salary, number in warehouse.get_sums(group, vacancy_name, statistic.monthly):
+                    if currency not in currency_to_rub:
+                        raise KeyError(currency)
+                    currency = currency if month is None else statistic.get_rate_key(currency, month)
+                    statistic.increment(dict, k, currency, salary, number)
+            statistic.count = warehouse.get_count()
+        return statistic
+
+    def get_statistic_by_columns(self, block_size=1 << 24):
+        """Считывает файл блоками в типизированные колонки Arrow и накапливает статистику
+        векторными операциями, без создания объектов Vacancy для каждой строки. Ключи словарей добавляются
+        в порядке первого появления, как при построчном чтении, потому что порядок групп group_by не задан.
+        Неизвестная валюта, как и в Vacancy, вызывает KeyError
+
+        Args:
+            block_size (int): Размер одного считываемого блока файла в байтах
+        Returns:
+            Statistic: Накопленная статистика по всем вакансиям файла
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        from pyarrow import csv as pa_csv
+
+        reader = pa_csv.open_csv(
+            self.filename,
+            read_options=pa_csv.ReadOptions(block_size=block_size),
+            parse_options=pa_csv.ParseOptions(invalid_row_handler=lambda row: 'skip'),
+            convert_options=pa_csv.ConvertOptions(column_types={name_list[1]: pa.float64(), name_list[2]: pa.float64(),
+                                                                name_list[5]: pa.string()},
+                                                  null_values=[''], strings_can_be_null=True))
+
+        statistic = self.new_statistic()
+        currencies = pa.array(list(currency_to_rub))
+        for batch in reader:
+            chunk = pa.Table.from_batches([batch]).drop_null()
+            if not chunk.num_rows:
+                continue
+            unknown = pc.invert(pc.is_in(chunk[name_list[3]], value_set=currencies))
+            if pc.any(unknown).as_py():
+                raise KeyError(chunk[name_list[3]].filter(unknown)[0].as_py())
+            salary = pc.cast(pc.floor(pc.divide(pc.add(chunk[name_list[1]], chunk[name_list[2]]), 2)), pa.int64())
+            currency = chunk[name_list[3]]
+            if statistic.monthly:
+                month = pc.utf8_slice_codeunits(chunk[name_list[5]], 0, 7)
+                currency = pc.if_else(pc.equal(currency, 'RUR'), currency,
+                                      pc.binary_join_element_wise(currency, month, ' '))
+            frame = pa.table({'salary': salary,
+                              'currency': currency,
+                              'year': pc.cast(pc.utf8_slice_codeunits(chunk[name_list[5]], 0, 4), pa.int64()),
+                              'area_name': chunk[name_list[4]],
+                              'is_vacancy': pc.match_substring(chunk[name_list[0]], self.vacancy_name)})
+
+            for dict, table, k in ((statistic.salary, frame, 'year'),
+                                   (statistic.salary_of_name, frame.filter(frame['is_vacancy']), 'year'),
+                                   (statistic.city, frame, 'area_name')):
+                for key in pc.unique(table[k]).to_pylist():
+                    if key not in dict:
+                        dict[key] = [{}, 0]
+                group = table.group_by([k, 'currency'], use_threads=False) \
+                    .aggregate([('salary', 'sum'), ('salary', 'count')])
+                for row in group.to_pylist():
+                    statistic.increment(dict, row[k], row['currency'], row['salary_sum'], row['salary_count'])
+            statistic.count += frame.num_rows
+        return statistic
+
+    def get_dynamics(self, by_columns=False, processes=1, incremental=False, indexed=False, by_mmap=False,
+                     from_warehouse=False):
         """Получает все необходимые статистики для дальнейшей работы
 
+        Args:
+            by_columns (bool): Считывать файл колонками Arrow вместо построчного создания объектов Vacancy
+            processes (int): Количество процессов для параллельного чтения файла по частям,
+                None - по количеству ядер
+            incremental (bool): Дополнять сохраненную статистику только новыми строками файла
+            indexed (bool): Получить статистику из триграммного индекса по названиям вакансий
+            by_mmap (bool): Разбирать строки в байтах отображенного в память файла
+            from_warehouse (bool): Получить статистику запросами к хранилищу вакансий в sqlite3
         Returns:
             dict, dict, dict, dict, dict, dict: Все необходимые статистики
         """
-        salary = {}
-        salary_of_name = {}
-        city = {}
-        count = 0
+        if indexed and self.rates is not None:
+            raise ValueError('В индексе по названиям нет месяцев публикации для перевода по таблице курсов')
+        if self.sketched and (by_columns or incremental or indexed or by_mmap or from_warehouse):
+            raise ValueError('Скетчи считаются только при построчном чтении файла')
+        if indexed:
+            statistic = NameIndex.open(self.filename).get_statistic(self.vacancy_name)
+        elif from_warehouse:
+            statistic = self.get_statistic_by_warehouse()
+        elif incremental:
+            statistic = self.get_statistic_incremental()
+        elif by_columns:
+            statistic = self.get_statistic_by_columns()
+        elif processes != 1:
+            statistic = self.get_statistic_by_shards(processes, by_mmap=by_mmap)
+        elif by_mmap:
+            statistic = self.get_statistic_by_mmap()
+        else:
+            statistic = self.get_statistic()
+        if self.sketched:
+            statistic = statistic.get_statistic()
+        return self.build_dynamics(statistic, self.rates)
 
-        for vacancy_dictionary in self.csv_reader():
-            vacancy = Vacancy(vacancy_dictionary)
-            self.increment(salary, vacancy.publication_year, [vacancy.salary_average])
-            if vacancy.name.find(self.vacancy_name) != -1:
-                self.increment(salary_of_name, vacancy.publication_year, [vacancy.salary_average])
-            self.increment(city, vacancy.area_name, [vacancy.salary_average])
-            count += 1
+    def get_quantile_dynamics(self, fractions=(0.5,), processes=1):
+        """Получает квантили зарплат (медиану, перцентили) по годам, по годам для выбранной профессии
+        и по городам. Зарплаты считаются скетчами, поэтому нужен режим sketched
+
+        Args:
+            fractions (tuple): Доли от 0 до 1, например 0.5 для медианы или 0.9 для 90-го перцентиля
+            processes (int): Количество процессов для параллельного чтения файла по частям,
+                None - по количеству ядер
+        Returns:
+            dict, dict, dict: Квантили в порядке fractions по годам, по годам для выбранной профессии
+                и для 10 городов с наибольшей долей вакансий (не меньше 1%) в порядке убывания доли
+        """
+        if not self.sketched:
+            raise ValueError('Квантили зарплат считаются только скетчами, нужен DataSet(..., sketched=True)')
+        statistic = self.get_statistic_by_shards(processes) if processes != 1 else self.get_statistic()
+        return self.build_quantile_dynamics(statistic, fractions)
+
+    def get_dynamics_by_professions(self, vacancy_names, processes=1, by_mmap=False, from_warehouse=False):
+        """Получает статистики сразу для нескольких профессий за один проход по файлу
+
+        Args:
+            vacancy_names (list): Названия профессий
+            processes (int): Количество процессов для параллельного чтения файла по частям,
+                None - по количеству ядер
+            by_mmap (bool): Разбирать строки в байтах отображенного в память файла
+            from_warehouse (bool): Получить статистику запросами к хранилищу вакансий в sqlite3
+        Returns:
+            dict: Для каждой профессии все необходимые статистики, как в get_dynamics
+        """
+        if self.sketched:
+            raise ValueError('Скетчи считаются только по выбранной профессии')
+        if from_warehouse:
+            statistic = self.get_statistic_by_warehouse(vacancy_names)
+        elif processes != 1:
+            statistic = self.get_statistic_by_shards(processes, vacancy_names, by_mmap)
+        elif by_mmap:
+            statistic = self.get_statistic_by_mmap(vacancy_names)
+        else:
+            statistic = self.get_statistic(vacancy_names=vacancy_names)
+        return dict([(vacancy_name, self.build_dynamics(statistic.get_statistic(vacancy_name), self.rates))
+                     for vacancy_name in statistic.vacancy_names])
 
-        number = dict([(k, len(v)) for k, v in salary_of_name.items()])
-        vacancy_number = dict([(k, len(v)) for k, v in salary.items()])
+    @staticmethod
+    def build_dynamics(statistic, rates=None):
+        """Получает все необходимые статистики из накопленных сумм и количеств зарплат
+
+        Args:
+            statistic (Statistic): Накопленная статистика по вакансиям
+            rates (CurrencyRates): Таблица курсов валют по месяцам для статистики, накопленной по месяцам
+        Returns:
+            dict, dict, dict, dict, dict, dict: Все необходимые статистики
+        """
+        salary, salary_of_name, city, count = \
+            statistic.salary, statistic.salary_of_name, statistic.city, statistic.count
+
+        number = dict([(k, v[1]) for k, v in salary_of_name.items()])
+        vacancy_number = dict([(k, v[1]) for k, v in salary.items()])
 
         if not salary_of_name:
             number = dict([(k, 0) for k, v in vacancy_number.items()])
-            salary_of_name = dict([(k, [0]) for k, v in salary.items()])
+            salary_of_name = dict([(k, [{}, 1]) for k, v in salary.items()])
 
-        dynamics1, dynamics2, dynamics3 = self.average(salary), self.average(salary_of_name), self.average(city)
+        dynamics1, dynamics2, dynamics3 = \
+            DataSet.average(salary, rates), DataSet.average(salary_of_name, rates), DataSet.average(city, rates)
 
         dynamics4 = {}
         for y, s in city.items():
-            dynamics4[y] = round(len(s) / count, 4)
+            dynamics4[y] = round(s[1] / count, 4)
         dynamics4 = list(filter(lambda x: x[-1] >= 0.01, [(k, v) for k, v in dynamics4.items()]))
         dynamics4.sort(key=lambda x: x[-1], reverse=True)
         dynamics5 = dict(dynamics4.copy()[:10])
@@ -142,6 +1207,30 @@ class DataSet:
 
         return dynamics1, vacancy_number, dynamics2, number, dynamics3, dynamics5
 
+    @staticmethod
+    def build_quantile_dynamics(statistic, fractions=(0.5,)):
+        """Получает квантили зарплат из скетчей статистики
+
+        Args:
+            statistic (SketchStatistic): Статистика, накопленная скетчами
+            fractions (tuple): Доли от 0 до 1
+        Returns:
+            dict, dict, dict: Квантили по годам, по годам для выбранной профессии и по городам, как в
+                get_quantile_dynamics
+        """
+        def get_quantiles(sketch):
+            return [int(value) for value in sketch.quantiles(fractions)]
+
+        dynamics1 = dict([(k, get_quantiles(sketch)) for k, sketch in statistic.salary_quantiles.items()])
+        dynamics2 = dict([(k, get_quantiles(statistic.salary_of_name_quantiles[k])
+                           if k in statistic.salary_of_name_quantiles else [0 for _ in fractions])
+                          for k in dynamics1])
+        cities = [(area_name, city) for area_name, _, city in statistic.cities.items()
+                  if round(city[1] / statistic.count, 4) >= 0.01]
+        cities.sort(key=lambda x: x[1][1], reverse=True)
+        dynamics3 = dict([(area_name, get_quantiles(city[2])) for area_name, city in cities[:10]])
+        return dynamics1, dynamics2, dynamics3
+
     @staticmethod
     def print_statistic(dynamics1, dynamics2, dynamics3, dynamics4, dynamics5, dynamics6):
         """Выводит все динамики с описанием
@@ -161,30 +1250,117 @@ class DataSet:
             print(list_print1[i] + '{0}'.format(list_print2[i]))
 
 
+def get_shard_statistic(filename, vacancy_name, header, start, end, vacancy_names=None, by_mmap=False,
+                        rates=None, sketched=False):
+    """Считает статистику по байтовому диапазону файла, выполняется в процессе пула
+
+    Args:
+        filename (str): Название файла с данными о вакансиях
+        vacancy_name (str): Название выбранной профессии
+        header (list): Заголовок файла
+        start (int): Начало диапазона
+        end (int): Конец диапазона
+        vacancy_names (list): Названия нескольких профессий, которые считаются вместо выбранной
+        by_mmap (bool): Разбирать диапазон в байтах отображенного в память файла
+        rates (CurrencyRates): Таблица курсов валют по месяцам
+        sketched (bool): Считать города и квантили зарплат скетчами
+    Returns:
+        Statistic: Статистика по вакансиям диапазона
+    """
+    dataset = DataSet(filename, vacancy_name, rates, sketched)
+    if by_mmap:
+        return dataset.get_statistic_by_mmap(vacancy_names, start, end)
+    return dataset.get_statistic(dataset.shard_reader(header, start, end), vacancy_names)
+
+
+def render_image(cache_dir, *args):
+    """Строит graph.png, выполняется в процессе пула
+
+    Args:
+        cache_dir (str): Папка кэша файлов отчета, None - без кэша
+        args: Аргументы конструктора Report
+    """
+    report = Report(*args)
+    report.render_cached(cache_dir, 'graph.png', report.generate_image)
+
+
+def render_excel(cache_dir, *args):
+    """Строит report.xlsx, выполняется в процессе пула
+
+    Args:
+        cache_dir (str): Папка кэша файлов отчета, None - без кэша
+        args: Аргументы конструктора Report
+    """
+    report = Report(*args)
+    report.render_cached(cache_dir, 'report.xlsx', report.generate_excel_streaming)
+
+
+def render_pdf(cache_dir, *args):
+    """Строит report.pdf по готовой картинке, выполняется в процессе пула
+
+    Args:
+        cache_dir (str): Папка кэша файлов отчета, None - без кэша
+        args: Аргументы конструктора Report
+    """
+    report = Report(*args)
+    report.render_cached(cache_dir, 'report.pdf', report.generate_pdf, report.get_template_version())
+
+
+def generate_report(formats, *args, cache_dir='render_cache'):
+    """Строит выбранные форматы отчета параллельно: картинка и xlsx-файл строятся в отдельных процессах,
+    pdf-файл начинает строиться, как только готова картинка. Каждый этап получает свою копию динамик.
+    Файлы, входные данные которых не изменились, берутся из кэша
+
+    Args:
+        formats (tuple): Форматы отчета, которые нужно получить: png, xlsx, pdf
+        args: Аргументы конструктора Report
+        cache_dir (str): Папка кэша файлов отчета, None - без кэша
+    """
+    with con_fut.ProcessPoolExecutor(max_workers=2) as executor:
+        futures = []
+        if 'xlsx' in formats:
+            futures.append(executor.submit(render_excel, cache_dir, *args))
+        if 'png' in formats or 'pdf' in formats:
+            image = executor.submit(render_image, cache_dir, *args)
+            futures.append(image)
+            if 'pdf' in formats:
+                image.result()
+                futures.append(executor.submit(render_pdf, cache_dir, *args))
+        for future in futures:
+            future.result()
+
+
 class InputConnect:
     """Класс для получения объектов DataSet и Report.
 
     Attributes:
         filename (str): Название файла с данными о вакансиях
         name_vacancy (str): Название выбранной профессии
+        formats (tuple): Форматы отчета, которые нужно получить: png, xlsx, pdf
+        rates (CurrencyRates): Таблица курсов валют по месяцам для перевода зарплат по курсу месяца публикации
     """
 
-    def __init__(self):
-        """Инициализирует объект InputConnect.
+    def __init__(self, formats=('png', 'xlsx', 'pdf'), rates=None, filename=None, name_vacancy=None):
+        """Инициализирует объект InputConnect. Название файла и профессии, которые не переданы,
+        запрашиваются у пользователя
+
+        Args:
+            formats (tuple): Форматы отчета, которые нужно получить: png, xlsx, pdf
+            rates (CurrencyRates): Таблица курсов валют по месяцам; без нее используются курсы currency_to_rub
+            filename (str): Название файла с данными о вакансиях
+            name_vacancy (str): Название выбранной профессии
         """
-        self.filename = input('Введите название файла: ')
-        self.name_vacancy = input('Введите название профессии: ')
+        self.formats, self.rates = formats, rates
+        self.filename = input('Введите название файла: ') if filename is None else filename
+        self.name_vacancy = input('Введите название профессии: ') if name_vacancy is None else name_vacancy
 
-        dataset = DataSet(self.filename, self.name_vacancy)
+        dataset = DataSet(self.filename, self.name_vacancy, rates)
 
-        dynamics1, dynamics2, dynamics3, dynamics4, dynamics5, dynamics6 = dataset.get_dynamics()
+        dynamics1, dynamics2, dynamics3, dynamics4, dynamics5, dynamics6 = \
+            dataset.get_dynamics(indexed=rates is None, by_mmap=rates is not None)
         dataset.print_statistic(dynamics1, dynamics2, dynamics3, dynamics4, dynamics5, dynamics6)
-        new_graphic = Report(self.name_vacancy, dynamics1, dynamics2, dynamics3, dynamics4, dynamics5, dynamics6)
-        new_graphic.generate_image()
-        work_sheet1 = new_graphic.get_first_sheet()
-        work_sheet2, len_new_data = new_graphic.get_second_sheet()
-        new_graphic.generate_excel(work_sheet1, work_sheet2, len_new_data)
-        new_graphic.generate_pdf()
+        generate_report(self.formats, self.name_vacancy, dynamics1, dynamics2, dynamics3, dynamics4, dynamics5,
+                        dynamics6)
 
 
 class Report:
@@ -200,6 +1376,7 @@ class Report:
         dynamics5 (dict): Уровень зарплат по городам (в порядке убывания)
         dynamics6 (dict): Доля вакансий по городам (в порядке убывания)
     """
+    render_version = 1
 
     def __init__(self, name_vacancy, dynamics1, dynamics2, dynamics3, dynamics4, dynamics5, dynamics6):
         """Инициализирует объект Report и получает объект Workbook.
@@ -213,6 +1390,8 @@ class Report:
             dynamics5 (dict): Уровень зарплат по городам (в порядке убывания)
             dynamics6 (dict): Доля вакансий по городам (в порядке убывания)
         """
+        from openpyxl import Workbook
+
         self.workbook = Workbook()
         self.name_vacancy = name_vacancy
         self.dynamics1 = dynamics1
@@ -222,9 +1401,47 @@ class Report:
         self.dynamics5 = dynamics5
         self.dynamics6 = dynamics6
 
+    @staticmethod
+    def get_template_version(template_name="pdf_template.html"):
+        """Получает версию шаблона pdf-файла по его содержимому
+
+        Args:
+            template_name (str): Путь к шаблону
+        Returns:
+            str: Хэш шаблона или пустая строка, если шаблона нет
+        """
+        try:
+            with open(template_name, mode='rb') as file:
+                return hashlib.sha256(file.read()).hexdigest()
+        except FileNotFoundError:
+            return ''
+
+    def render_cached(self, cache_dir, file_name, render, template_version=''):
+        """Строит файл отчета или берет его из кэша, если входные данные не изменились.
+        Ключ кэша - хэш динамик, названия профессии, версии отрисовки и версии шаблона
+
+        Args:
+            cache_dir (str): Папка кэша, None - строить без кэша
+            file_name (str): Файл отчета, который строит render
+            render (function): Функция, которая строит файл
+            template_version (str): Версия шаблона
+        """
+        if cache_dir is None:
+            render()
+            return
+        cache = RenderCache(cache_dir)
+        key = cache.get_key(file_name, self.render_version, template_version, self.name_vacancy, self.dynamics1,
+                            self.dynamics2, self.dynamics3, self.dynamics4, self.dynamics5, self.dynamics6)
+        if not cache.get(key, file_name):
+            render()
+            cache.put(key, file_name)
+
     def generate_image(self):
         """Генерирует 4 диаграммы в на одной старнице на основе статистик, после чего сохраняет картинку в файл graph.png
         """
+        import matplotlib.pyplot as plt
+        import numpy as np
+
         x = np.arange(len(self.dynamics1.keys()))
         width = 0.35
 
@@ -272,6 +1489,8 @@ class Report:
         Returns:
             Worksheet: Первая страница рабочей книги
         """
+        from openpyxl.utils import get_column_letter
+
         work_sheet1 = self.workbook.active
         work_sheet1.title = 'Статистика по годам'
         work_sheet1.append(['Год', 'Средняя зарплата', 'Средняя зарплата - ' + self.name_vacancy, 'Количество вакансий',
@@ -302,6 +1521,8 @@ class Report:
             Worksheet: Вторая страница рабочей книги
             int: Количество строк
         """
+        from openpyxl.utils import get_column_letter
+
         new_data = [['Город', 'Уровень зарплат', '', 'Город', 'Доля вакансий']]
 
         for (city1, value1), (city2, value2) in zip(self.dynamics5.items(), self.dynamics6.items()):
@@ -332,6 +1553,8 @@ class Report:
             work_sheet2 (Worksheet): Вторая страница рабочей книги
             len_new_data (int): Количество строк
         """
+        from openpyxl.styles import Font, Border, Side
+
         bold = Font(bold=True)
         for c in 'ABCDE':
             work_sheet1[c + '1'].font = bold
@@ -346,16 +1569,121 @@ class Report:
             for column in 'ABDE':
                 work_sheet2[column + str(row + 1)].border = Border(left=slim, bottom=slim, right=slim, top=slim)
 
-        self.dynamics1[1] = 1
-        for row, _ in enumerate(self.dynamics1):
+        for row in range(len(self.dynamics1) + 1):
             for column in 'ABCDE':
                 work_sheet1[column + str(row + 1)].border = Border(left=slim, bottom=slim, right=slim, top=slim)
 
         self.workbook.save('report.xlsx')
 
+    @staticmethod
+    def get_column_widths(rows):
+        """Вычисляет ширину столбцов за один проход по строкам, не сохраняя сами строки
+
+        Args:
+            rows (iterable): Строки страницы
+        Returns:
+            list: Наибольшая длина значения в каждом столбце
+        """
+        column_widths = []
+        for row in rows:
+            for i, cell in enumerate(row):
+                length = len(str(cell))
+                if len(column_widths) > i:
+                    if length > column_widths[i]:
+                        column_widths[i] = length
+                else:
+                    column_widths.append(length)
+        return column_widths
+
+    @staticmethod
+    def write_sheet(workbook, title, header, rows, column_widths, bordered, number_formats=None):
+        """Записывает страницу потоковой рабочей книги строка за строкой.
+
+        Стили создаются один раз на столбец: каждая ячейка получает копию стиля ячейки-образца,
+        а не собирает шрифт и рамку заново, поэтому время записи линейно по числу строк,
+        а память не зависит от него.
+
+        Args:
+            workbook (Workbook): Рабочая книга в режиме write_only
+            title (str): Название страницы
+            header (list): Заголовок таблицы
+            rows (iterable): Строки таблицы, могут быть генератором
+            column_widths (list): Ширина столбцов без отступа
+            bordered (str): Буквы столбцов, ячейки которых обводятся рамкой
+            number_formats (dict): Формат чисел по букве столбца
+        """
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, Border, Side
+        from openpyxl.utils import get_column_letter
+
+        work_sheet = workbook.create_sheet(title)
+        for i, column_width in enumerate(column_widths, 1):
+            work_sheet.column_dimensions[get_column_letter(i)].width = column_width + 2
+
+        slim = Side(border_style='thin', color='00000000')
+        border = Border(left=slim, bottom=slim, right=slim, top=slim)
+        bold = Font(bold=True)
+        number_formats = number_formats or {}
+        header_cells, templates = [], []
+        for i, value in enumerate(header, 1):
+            column = get_column_letter(i)
+            header_cell = WriteOnlyCell(work_sheet, value)
+            header_cell.font = bold
+            template = WriteOnlyCell(work_sheet)
+            if column in bordered:
+                header_cell.border = border
+                template.border = border
+            if column in number_formats:
+                template.number_format = number_formats[column]
+            header_cells.append(header_cell)
+            templates.append(template)
+        work_sheet.append(header_cells)
+
+        for row in rows:
+            cells = []
+            for template, value in zip(templates, row):
+                cell = WriteOnlyCell(work_sheet, value)
+                cell._style = copy.copy(template._style)
+                cells.append(cell)
+            work_sheet.append(cells)
+
+    def generate_excel_streaming(self, file_name='report.xlsx'):
+        """Сохраняет отчет в xlsx-файл через потоковую рабочую книгу openpyxl (write_only).
+        Оформление совпадает с generate_excel, но строки не хранятся в памяти, поэтому режим подходит
+        для выгрузки разбивок по городам и профессиям на сотни тысяч строк
+
+        Args:
+            file_name (str): Путь к xlsx-файлу
+        """
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+
+        header1 = ['Год', 'Средняя зарплата', 'Средняя зарплата - ' + self.name_vacancy, 'Количество вакансий',
+                   'Количество вакансий - ' + self.name_vacancy]
+        column_widths1 = [len(cell) + 1 for cell in header1]
+        rows1 = ([year, self.dynamics1[year], self.dynamics3[year], self.dynamics2[year], self.dynamics4[year]]
+                 for year in self.dynamics1.keys())
+        self.write_sheet(workbook, 'Статистика по годам', header1, rows1, column_widths1, 'ABCDE')
+
+        header2 = ['Город', 'Уровень зарплат', '', 'Город', 'Доля вакансий']
+
+        def rows2():
+            for (city1, value1), (city2, value2) in zip(self.dynamics5.items(), self.dynamics6.items()):
+                yield [city1, value1, '', city2, value2]
+
+        column_widths2 = self.get_column_widths(itertools.chain([header2], rows2()))
+        self.write_sheet(workbook, 'Статистика по городам', header2, rows2(), column_widths2, 'ABDE',
+                         {'E': '0.00%'})
+
+        workbook.save(file_name)
+
     def generate_pdf(self):
         """Генирирует и сохраняет файл report.pdf, в котором хранятся report.xlsx и graph.png
         """
+        import pdfkit
+        from jinja2 import Environment, FileSystemLoader
+
         env = Environment(loader=FileSystemLoader('.'))
         template = env.get_template("pdf_template.html")
         dynamics = []
@@ -363,12 +1691,11 @@ class Report:
             dynamics.append(
                 [year, self.dynamics1[year], self.dynamics2[year], self.dynamics3[year], self.dynamics4[year]])
 
-        for key in self.dynamics6:
-            self.dynamics6[key] = round(self.dynamics6[key] * 100, 2)
+        dynamics6 = dict([(key, round(value * 100, 2)) for key, value in self.dynamics6.items()])
 
         pdf_template = template.render({'name': self.name_vacancy,
                                         'path': '{0}/{1}'.format(pathlib.Path(__file__).parent.resolve(), 'graph.png'),
-                                        'dynamics': dynamics, 'dynamics5': self.dynamics5, 'dynamics6': self.dynamics6})
+                                        'dynamics': dynamics, 'dynamics5': self.dynamics5, 'dynamics6': dynamics6})
 
         config = pdfkit.configuration(wkhtmltopdf=r'C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe')
         pdfkit.from_string(pdf_template, 'report.pdf', configuration=config, options={"enable-local-file-access": ""})
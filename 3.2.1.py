@@ -1,4 +1,5 @@
 import pandas
+import csv_cache
 
 pandas.set_option("display.max_columns", False)
 pandas.set_option("expand_frame_repr", False)
@@ -10,7 +11,7 @@ def info_by_year(path):
     Args:
         path (str): Путь к входному csv-файлу
     """
-    df = pandas.read_csv(path)
+    df = csv_cache.read_csv(path)
     df["year"] = df["published_at"].apply(lambda x: x[:4])
     df = df.groupby("year")
     for y, info in df:
@@ -18,4 +19,5 @@ def info_by_year(path):
             to_csv(rf"Data\info_by_years\{y}_year.csv", index=False)
 
 
-info_by_year("Data/vacancies_by_year.csv")
\ No newline at end of file
+if __name__ == '__main__':
+    info_by_year("Data/vacancies_by_year.csv")
\ No newline at end of file
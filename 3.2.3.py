@@ -1,12 +1,286 @@
-import multiprocessing
-import cProfile
+import functools
 import os
+import re
+import numpy as np
 import pandas
+import csv_cache
+from warehouse import VacancyWarehouse, is_regex
+from sketches import SpaceSaving
 import concurrent.futures as con_fut
+from multiprocessing import shared_memory
 
 list_print1 = ['Динамика уровня зарплат по годам: ','Динамика количества вакансий по годам: ',
                       'Динамика уровня зарплат по годам для выбранной профессии: ','Динамика количества вакансий по годам для выбранной профессии: ',
                       'Уровень зарплат по городам (в порядке убывания): ','Доля вакансий по городам (в порядке убывания): ']
+years_dir = os.path.join("Data", "info_by_years")
+backends = ("serial", "thread", "process", "chunked-process")
+attached_columns = {}
+
+def get_statistic_by_frame(df, name_vacancy):
+    """Составляет статистику по вакансиям одного года, уже считанным в память
+    Args:
+        df (DataFrame): Вакансии за год с колонками name, salary, published_at (год)
+        name_vacancy (str): Название выбранной профессии
+    Returns:
+        str, [int, int, int, int]: год, [ср. зп, всего вакансий, ср. зп для профессии, вакансий по профессии]
+    """
+    info_of_file_vacancy = df[df["name"].str.contains(name_vacancy)]
+
+    return int(df["published_at"].values[0]), [int(df["salary"].mean()), len(df),
+                                          int(info_of_file_vacancy["salary"].mean() if len(info_of_file_vacancy) != 0 else 0), len(info_of_file_vacancy)]
+
+
+def get_statistic_by_file(file_csv, name_vacancy):
+    """Составляет статистику по файлу с вакансиями одного года
+    Args:
+        file_csv (str): Название файла с данными о вакансиях за год
+        name_vacancy (str): Название выбранной профессии
+    Returns:
+        str, [int, int, int, int]: год, [ср. зп, всего вакансий, ср. зп для профессии, вакансий по профессии]
+    """
+    df = pandas.read_csv(file_csv)
+    df["salary"] = df[["salary_from", "salary_to"]].mean(axis=1)
+    df["published_at"] = df["published_at"].apply(lambda s: int(s[:4]))
+
+    return get_statistic_by_frame(df, name_vacancy)
+
+
+def attach_columns(spec):
+    """Подключает колонки SharedColumns в текущем процессе. Подключение запоминается, поэтому каждый процесс
+    пула открывает разделяемую память один раз, а не в каждой задаче
+    Args:
+        spec (dict): Для каждой колонки имя блока разделяемой памяти, тип и длина
+    Returns:
+        dict: Массивы numpy поверх разделяемой памяти
+    """
+    key = tuple(name for name, _, _ in spec.values())
+    if key not in attached_columns:
+        blocks = dict([(column, shared_memory.SharedMemory(name=name)) for column, (name, _, _) in spec.items()])
+        arrays = dict([(column, np.ndarray((length,), dtype=dtype, buffer=blocks[column].buf))
+                       for column, (_, dtype, length) in spec.items()])
+        attached_columns[key] = blocks, arrays
+    return attached_columns[key][1]
+
+
+def find_rows(names, offsets, start, end, name_vacancy):
+    """Находит строки, в названии которых есть name_vacancy, поиском подстроки по байтам названий,
+    без создания строк Python для каждой вакансии. Если name_vacancy - регулярное выражение,
+    названия декодируются и проверяются по одному, как в str.contains
+    Args:
+        names (ndarray): Байты всех названий в кодировке UTF-8 подряд
+        offsets (ndarray): Начало каждого названия в names и конец последнего
+        start (int): Первая строка диапазона
+        end (int): Строка после последней строки диапазона
+        name_vacancy (str): Название выбранной профессии
+    Returns:
+        ndarray: Номера найденных строк
+    """
+    low = offsets[start]
+    data = names[low:offsets[end]].tobytes()
+    if is_regex(name_vacancy):
+        pattern = re.compile(name_vacancy)
+        return np.array([row for row in range(start, end) if pattern.search(
+            data[offsets[row] - low:offsets[row + 1] - low].decode("utf-8"))], dtype=np.int64)
+    needle = name_vacancy.encode("utf-8")
+    if not needle:
+        return np.arange(start, end)
+
+    positions = []
+    position = data.find(needle)
+    while position != -1:
+        positions.append(position)
+        position = data.find(needle, position + 1)
+    positions = np.array(positions, dtype=np.int64) + low
+    rows = np.searchsorted(offsets, positions, side="right") - 1
+    return np.unique(rows[positions + len(needle) <= offsets[rows + 1]])
+
+
+def encode_names(names, order):
+    """Записывает названия байтами UTF-8 подряд с массивом начал, как строковые колонки Arrow.
+    С pyarrow перекодирование и перестановка выполняются без создания объектов bytes для каждой строки
+    Args:
+        names (Series): Названия вакансий
+        order (ndarray): Порядок строк
+    Returns:
+        ndarray, ndarray: Байты названий и начало каждого названия с концом последнего
+    """
+    names = names.fillna("").astype(str)
+    try:
+        import pyarrow
+    except ImportError:
+        encoded = [name.encode("utf-8") for name in names.to_numpy()[order].tolist()]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(name) for name in encoded], out=offsets[1:])
+        return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+    array = pyarrow.array(names, type=pyarrow.large_string(), from_pandas=True).take(pyarrow.array(order))
+    if isinstance(array, pyarrow.ChunkedArray):
+        array = array.combine_chunks()
+    _, offsets, data = array.buffers()
+    offsets = np.frombuffer(offsets, dtype=np.int64)[array.offset:array.offset + len(array) + 1]
+    data = np.frombuffer(data, dtype=np.uint8) if data is not None else np.zeros(0, dtype=np.uint8)
+    return data[offsets[0]:offsets[-1]], offsets - offsets[0]
+
+
+def get_statistic_by_range(spec, name_vacancy, rows_range):
+    """Составляет статистику по вакансиям одного года, которые лежат в разделяемой памяти.
+    В процесс передаются только границы года и описание колонок, сами данные не копируются
+    Args:
+        spec (dict): Описание колонок SharedColumns
+        name_vacancy (str): Название выбранной профессии
+        rows_range (tuple): Первая строка года и строка после последней
+    Returns:
+        int, [int, int, int, int]: год, [ср. зп, всего вакансий, ср. зп для профессии, вакансий по профессии]
+    """
+    start, end = rows_range
+    columns = attach_columns(spec)
+    salary = columns["salary"]
+    rows = find_rows(columns["names"], columns["offsets"], start, end, name_vacancy)
+
+    return int(columns["year"][start]), [int(np.nanmean(salary[start:end])), end - start,
+                                         int(np.nanmean(salary[rows]) if len(rows) != 0 else 0), len(rows)]
+
+
+class SharedColumns:
+    """Класс для передачи вакансий в процессы пула через разделяемую память.
+
+    Колонки года, зарплаты и названий один раз копируются в блоки multiprocessing.shared_memory,
+    строки упорядочены по году, поэтому каждый год - непрерывный диапазон строк. Названия хранятся
+    байтами UTF-8 подряд с массивом начал, как строковые колонки Arrow.
+
+    Attributes:
+        blocks (dict): Блоки разделяемой памяти по колонкам
+        spec (dict): Для каждой колонки имя блока, тип и длина; передается в процессы вместо данных
+        ranges (list): Диапазоны строк каждого года
+    """
+
+    def __init__(self, df):
+        """Инициализирует объект SharedColumns и копирует колонки в разделяемую память.
+        Args:
+            df (DataFrame): Вакансии с колонками name, salary, year
+        """
+        order = np.argsort(df["year"].to_numpy(), kind="stable")
+        year = df["year"].to_numpy(dtype=np.int32)[order]
+        names, offsets = encode_names(df["name"], order)
+        columns = {"year": year, "salary": df["salary"].to_numpy(dtype=np.float64)[order], "offsets": offsets,
+                   "names": names}
+
+        self.blocks, self.spec, arrays = {}, {}, {}
+        try:
+            for column, values in columns.items():
+                block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+                self.blocks[column] = block
+                arrays[column] = np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)
+                arrays[column][:] = values
+                self.spec[column] = (block.name, values.dtype.str, len(values))
+        except BaseException:
+            arrays.clear()
+            self.close()
+            raise
+        attached_columns[tuple(name for name, _, _ in self.spec.values())] = {}, arrays
+
+        bounds = np.concatenate([[0], np.flatnonzero(np.diff(year)) + 1, [len(year)]]).tolist()
+        self.ranges = list(zip(bounds[:-1], bounds[1:])) if len(year) else []
+
+    def close(self):
+        """Освобождает разделяемую память
+        """
+        entry = attached_columns.pop(tuple(name for name, _, _ in self.spec.values()), None)
+        if entry is not None:
+            entry[1].clear()
+        for block in self.blocks.values():
+            block.close()
+            block.unlink()
+        self.blocks = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def get_statistic_by_batch(function, batch):
+    """Составляет статистику по нескольким годам в одной задаче исполнителя
+    Args:
+        function (function): Функция статистики по одному году
+        batch (list): Данные лет: файлы или DataFrame
+    Returns:
+        list: Статистика по каждому году
+    """
+    return [function(task) for task in batch]
+
+
+def get_batches(tasks, sizes, max_workers, tasks_per_worker=4):
+    """Объединяет соседние небольшие годы в пачки, чтобы на каждый процесс приходилось около tasks_per_worker
+    задач примерно одинакового объема. Большие годы остаются отдельными задачами, порядок лет сохраняется
+    Args:
+        tasks (list): Данные лет: файлы или DataFrame
+        sizes (list): Объем каждого года: размер файла или количество строк
+        max_workers (int): Количество процессов
+        tasks_per_worker (int): Желаемое количество задач на процесс
+    Returns:
+        list: Пачки лет
+    """
+    target = sum(sizes) / (max_workers * tasks_per_worker)
+    batches, batch, batch_size = [], [], 0
+    for task, size in zip(tasks, sizes):
+        batch.append(task)
+        batch_size += size
+        if batch_size >= target:
+            batches.append(batch)
+            batch, batch_size = [], 0
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class SerialExecutor(con_fut.Executor):
+    """Класс исполнителя, который выполняет задачи сразу в текущем процессе. Нужен, чтобы последовательный
+    режим работал через тот же интерфейс concurrent.futures, что и пулы потоков и процессов
+    """
+
+    def submit(self, fn, /, *args, **kwargs):
+        """Выполняет задачу и возвращает завершенный Future
+        Args:
+            fn (function): Функция задачи
+            args: Аргументы функции
+            kwargs: Именованные аргументы функции
+        Returns:
+            Future: Результат или исключение задачи
+        """
+        future = con_fut.Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+def get_executor(backend, max_workers):
+    """Создает исполнитель задач для выбранного режима
+    Args:
+        backend (str): Режим: serial, thread, process или chunked-process
+        max_workers (int): Количество потоков или процессов
+    Returns:
+        Executor: Исполнитель задач
+    """
+    if backend == "serial":
+        return SerialExecutor()
+    if backend == "thread":
+        return con_fut.ThreadPoolExecutor(max_workers=max_workers)
+    if backend in ("process", "chunked-process"):
+        return con_fut.ProcessPoolExecutor(max_workers=max_workers)
+    raise ValueError("Неизвестный режим: {0}, доступны {1}".format(backend, ", ".join(backends)))
+
+
+def new_city():
+    """Создает данные нового отслеживаемого города для SpaceSaving
+    Returns:
+        list: Сумма и количество заполненных зарплат
+    """
+    return [0.0, 0]
+
 
 class Solution:
     """Класс для получения и печати статистик
@@ -19,15 +293,23 @@ class Solution:
         stats4 (dict): Динамика количества вакансий по годам для выбранной профессии
         stats5 (dict): Уровень зарплат по городам (в порядке убывания)
         stats6 (dict): Доля вакансий по городам (в порядке убывания)
+        backend (str): Режим выполнения статистики по годам: serial, thread, process или chunked-process
+        max_workers (int): Количество потоков или процессов
     """
-    def __init__(self, path_to_file, name_vacancy):
+    def __init__(self, path_to_file, name_vacancy, backend="chunked-process", max_workers=None):
         """Инициализирует объект Solution.
         Args:
             name_vacancy (str): Название выбранной профессии
             path_to_file (str): Путь к входному csv-файлу
+            backend (str): Режим выполнения статистики по годам: serial, thread, process или chunked-process
+            max_workers (int): Количество потоков или процессов, по умолчанию по количеству ядер
         """
+        if backend not in backends:
+            raise ValueError("Неизвестный режим: {0}, доступны {1}".format(backend, ", ".join(backends)))
         self.path = path_to_file
         self.name_vacancy = name_vacancy
+        self.backend = backend
+        self.max_workers = max_workers or os.cpu_count() or 1
         self.stats1 = {}
         self.stats2 = {}
         self.stats3 = {}
@@ -38,18 +320,95 @@ class Solution:
     def split_by_year(self):
         """Разделяет входной файл на меньшие, группирует по годам
         """
-        df = pandas.read_csv(self.path)
+        df = csv_cache.read_csv(self.path)
         df["year"] = df["published_at"].apply(lambda x: x[:4])
         df = df.groupby("year")
+        os.makedirs(years_dir, exist_ok=True)
         for y, info in df:
             info[["name", "salary_from", "salary_to", "salary_currency", "area_name", "published_at"]]. \
-                to_csv(rf"Data\info_by_years\{y}_year.csv", index=False)
+                to_csv(os.path.join(years_dir, f"{y}_year.csv"), index=False)
 
-    def get_stats(self):
+    def get_stats(self, in_memory=False, from_warehouse=False, sketched=False):
         """Получение статистики
+        Args:
+            in_memory (bool): Считать файл один раз и делить по годам в памяти, без split_by_year
+            from_warehouse (bool): Получить статистику запросами к хранилищу вакансий в sqlite3
+            sketched (bool): Получить статистику по городам потоково, в памяти фиксированного размера
+        """
+        if from_warehouse:
+            self.get_stats_from_warehouse()
+            return
+        if in_memory:
+            self.get_stats_in_memory(sketched)
+            return
+        self.get_stats_by_year()
+        if sketched:
+            self.get_stats_by_city_sketched()
+        else:
+            self.get_stats_by_city()
+
+    def read_vacancies(self):
+        """Считывает входной файл один раз и подготавливает колонки salary и год публикации
+        Returns:
+            DataFrame: Все вакансии входного файла
         """
-        self.get_stats_by_year_with_multiprocessing()
-        self.get_stats_by_city()
+        df = csv_cache.read_csv(self.path)
+        df["salary"] = df[["salary_from", "salary_to"]].mean(axis=1)
+        df["year"] = df["published_at"].str[:4].astype(int)
+        return df
+
+    def get_stats_in_memory(self, sketched=False):
+        """Получает статистики по годам и городам за одно чтение входного файла. Нужные колонки один раз
+        копируются в разделяемую память, в процессы пула передаются только границы годов и название профессии,
+        поэтому процессы не читают файл и не получают копии данных
+        Args:
+            sketched (bool): Получить статистику по городам через get_stats_by_city_sketched
+        """
+        df = self.read_vacancies()
+        with SharedColumns(df) as columns:
+            result = self.map_years(functools.partial(get_statistic_by_range, columns.spec, self.name_vacancy),
+                                    columns.ranges, [end - start for start, end in columns.ranges])
+
+        self.add_elements_to_stats(result)
+        if sketched:
+            self.get_stats_by_city_sketched(df)
+        else:
+            self.get_stats_by_city(df)
+
+    def get_stats_from_warehouse(self):
+        """Получает статистики по годам и городам запросами GROUP BY к хранилищу вакансий в sqlite3, без чтения
+        входного файла. При первом запросе и после изменения файла он загружается в хранилище заново
+        """
+        with VacancyWarehouse.open(self.path) as warehouse:
+            years = warehouse.get_means("year")
+            professions = dict([(y, (salary, number)) for y, salary, number in
+                                warehouse.get_means("year", self.name_vacancy)])
+            cities = warehouse.get_means("area")
+            total = warehouse.get_total()
+
+        for y, salary, number in years:
+            salary_of_name, number_of_name = professions.get(y, (0, 0))
+            self.add_elements_to_stats([(y, [int(salary), number, int(salary_of_name or 0), number_of_name])])
+
+        cities = [(area_name, salary, float(number)) for area_name, salary, number in cities if number > total * 0.01]
+        self.set_stats_by_city(pandas.DataFrame(cities, columns=["area_name", "salary", "count"]), total)
+
+    def map_years(self, function, tasks, sizes):
+        """Выполняет статистику по каждому году в выбранном режиме. В режиме chunked-process
+        небольшие годы объединяются в пачки, чтобы не тратить время на пересылку множества мелких задач
+        Args:
+            function (function): Функция статистики по одному году, должна передаваться в другой процесс
+            tasks (list): Данные лет: файлы или DataFrame
+            sizes (list): Объем каждого года: размер файла или количество строк
+        Returns:
+            list: Статистика по каждому году в порядке tasks
+        """
+        with get_executor(self.backend, self.max_workers) as executor:
+            if self.backend != "chunked-process":
+                return list(executor.map(function, tasks))
+            batches = get_batches(tasks, sizes, self.max_workers)
+            return [statistic for result in executor.map(functools.partial(get_statistic_by_batch, function), batches)
+                    for statistic in result]
 
     def get_statistic_by_year(self, file_csv):
         """Составляет статистику по году
@@ -58,13 +417,33 @@ class Solution:
         Returns:
             str, [int, int, int, int]: год, [ср. зп, всего вакансий, ср. зп для профессии, вакансий по профессии]
         """
-        df = pandas.read_csv(file_csv)
-        df["salary"] = df[["salary_from", "salary_to"]].mean(axis=1)
-        df["published_at"] = df["published_at"].apply(lambda s: int(s[:4]))
-        info_of_file_vacancy = df[df["name"].str.contains(self.name_vacancy)]
+        return get_statistic_by_file(file_csv, self.name_vacancy)
+
+    def get_stats_by_professions(self, names_vacancy):
+        """Составляет статистику по годам сразу для нескольких профессий за одно чтение файла.
+        Профессии сопоставляются не со всеми строками, а только с уникальными названиями вакансий:
+        сначала одним регулярным выражением-альтернативой всех профессий, затем каждая профессия отдельно
+        Args:
+            names_vacancy (list): Названия профессий
+        Returns:
+            dict: Для каждой профессии ср. зп по годам и количество вакансий по годам
+        """
+        df = self.read_vacancies()
+        years = sorted(df["year"].unique().tolist())
+        pattern = re.compile("|".join(map(re.escape, names_vacancy)))
+        titles = {name: [] for name in names_vacancy}
+        for title in df["name"].dropna().unique():
+            if pattern.search(title):
+                for name in names_vacancy:
+                    if name in title:
+                        titles[name].append(title)
 
-        return df["published_at"].values[0], [int(df["salary"].mean()), len(df),
-                                              int(info_of_file_vacancy["salary"].mean() if len(info_of_file_vacancy) != 0 else 0), len(info_of_file_vacancy)]
+        result = {}
+        for name in names_vacancy:
+            info = df[df["name"].isin(titles[name])].groupby("year")["salary"].agg(["mean", "size"])
+            result[name] = ({y: int(info.at[y, "mean"]) if y in info.index else 0 for y in years},
+                            {y: int(info.at[y, "size"]) if y in info.index else 0 for y in years})
+        return result
 
     def add_elements_to_stats(self, result):
         """Добавляет значения в статистику по годам
@@ -77,36 +456,39 @@ class Solution:
             self.stats3[y] = data_stats[2]
             self.stats4[y] = data_stats[3]
 
-    def get_stats_by_year_not_with_multiprocessing(self):
-        """Получает статистики по годам с использованием только одиного процесса
+    def get_stats_by_year(self):
+        """Получает статистики по годам из файлов, созданных split_by_year, в выбранном режиме
         """
-        result = []
-        for filename in os.listdir("Data/info_by_years"):
-            with open(os.path.join("Data/info_by_years", filename), "r") as file_csv:
-                result.append(self.get_statistic_by_year(file_csv.name))
+        files = [os.path.join(years_dir, file_name) for file_name in sorted(os.listdir(years_dir))]
+        result = self.map_years(functools.partial(get_statistic_by_file, name_vacancy=self.name_vacancy),
+                                files, [os.path.getsize(file) for file in files])
 
         self.add_elements_to_stats(result)
 
-    def get_stats_by_year_with_multiprocessing(self):
-        """Получает статистики по годам с использованием нескольких процессов
-        """
-        files = [rf"Data/info_by_years\{file_name}" for file_name in os.listdir(rf"Data/info_by_years")]
-        pool = multiprocessing.Pool(4)
-        result = pool.starmap(self.get_statistic_by_year, [(file,) for file in files])
-        pool.close()
-
-        self.add_elements_to_stats(result)
-
-    def get_stats_by_city(self):
+    def get_stats_by_city(self, df=None):
         """Получает статистики по городам
+        Args:
+            df (DataFrame): Уже считанные вакансии с колонкой salary, по умолчанию считывается входной файл
         """
-        df = pandas.read_csv(self.path_to_file)
+        if df is None:
+            df = csv_cache.read_csv(self.path)
+            df["salary"] = df[["salary_from", "salary_to"]].mean(axis=1)
         total = len(df)
-        df["salary"] = df[["salary_from", "salary_to"]].mean(axis=1)
+        df = df[["area_name", "salary"]].copy()
         df["count"] = df.groupby("area_name")["area_name"].transform("count")
         df = df[df["count"] > total * 0.01]
         df = df.groupby("area_name", as_index=False)
-        df = df[["salary", "count"]].mean().sort_values("salary", ascending=False)
+        self.set_stats_by_city(df[["salary", "count"]].mean(), total)
+
+    def set_stats_by_city(self, df, total):
+        """Заполняет статистики по городам из средних зарплат и количеств вакансий городов. Сортировка
+        и округление общие для всех способов подсчета, поэтому они дают одинаковый результат, в том числе
+        для равных значений
+        Args:
+            df (DataFrame): Города с долей больше 1% по возрастанию area_name с колонками area_name, salary, count
+            total (int): Количество всех вакансий
+        """
+        df = df.sort_values("salary", ascending=False)
         df["salary"] = df["salary"].apply(lambda s: int(s))
 
         self.stats5 = dict(zip(df.head(10)["area_name"], df.head(10)["salary"]))
@@ -116,6 +498,35 @@ class Solution:
 
         self.stats6 = dict(zip(df.head(10)["area_name"], df.head(10)["count"]))
 
+    def get_stats_by_city_sketched(self, df=None, chunk_size=100000, capacity=200):
+        """Получает статистики по городам без подсчета количества для каждой строки: файл читается частями
+        по chunk_size строк, а города считаются SpaceSaving, поэтому память не зависит от размера файла
+        и количества городов. Количество и средняя зарплата города ведутся с момента, когда он начал
+        отслеживаться; город с долей вакансий больше 1 / capacity отслеживается с первой вакансии
+        Args:
+            df (DataFrame): Уже считанные вакансии с колонкой salary, по умолчанию файл читается частями
+            chunk_size (int): Количество строк в одной части
+            capacity (int): Количество гарантированно отслеживаемых городов
+        """
+        if df is None:
+            chunks = pandas.read_csv(self.path, usecols=["salary_from", "salary_to", "area_name"], chunksize=chunk_size)
+        else:
+            chunks = (df[start:start + chunk_size] for start in range(0, len(df), chunk_size))
+        sketch = SpaceSaving(capacity, new_city)
+        total = 0
+        for chunk in chunks:
+            salary = chunk["salary"] if "salary" in chunk else chunk[["salary_from", "salary_to"]].mean(axis=1)
+            info = salary.groupby(chunk["area_name"], sort=False).agg(["sum", "count", "size"])
+            for area_name, salary_sum, count, size in info.itertuples():
+                city = sketch.add(area_name, size)
+                city[0] += salary_sum
+                city[1] += count
+            total += len(chunk)
+
+        cities = sorted([(area_name, city[0] / city[1] if city[1] else 0, float(number))
+                         for area_name, number, city in sketch.items() if number > total * 0.01])
+        self.set_stats_by_city(pandas.DataFrame(cities, columns=["area_name", "salary", "count"]), total)
+
     def print_statistic(self):
         """Выводит всю статистику с описанием
         Prints:
@@ -125,25 +536,8 @@ class Solution:
         for i in range(len(list_print1)):
             print(list_print1[i] + '{0}'.format(list_print2[i]))
 
-    def get_stats_by_year_with_concurrent_futures(self):
-        """Получает статистики по годам с использованием модуля concurrent futures
-        """
-        files = [rf"Data/info_by_years\{file_name}" for file_name in os.listdir("Data/info_by_years")]
-        with con_fut.ProcessPoolExecutor(max_workers=4) as executer:
-            res = executer.map(self.get_statistic_by_year, files)
-        result = list(res)
-
-        self.add_elements_to_stats(result)
-
 
 if __name__ == '__main__':
     solve = Solution(input("Введите название файла: "), input("Введите название профессии: "))
-    solve.split_by_year()
-    solve.get_stats()
+    solve.get_stats(in_memory=True)
     solve.print_statistic()
-
-    # solve = Solution("Data/vacancies_by_year.csv", "Аналитик")
-    # solve.split_by_year()
-    # cProfile.run("solve.get_stats_by_year_not_with_multiprocessing()", sort="cumtime")
-    # cProfile.run("solve.get_stats_by_year_with_multiprocessing()", sort="cumtime")
-    # cProfile.run("solve.get_stats_by_year_with_concurrent_futures()", sort="cumtime")
\ No newline at end of file
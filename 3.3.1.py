@@ -1,6 +1,12 @@
+import concurrent.futures as con_fut
+import os
+import time
 import pandas as pd
 import xmltodict
 import requests
+import csv_cache
+
+CBR_URL = "http://www.cbr.ru/scripts/XML_daily.asp"
 
 def get_currency(file_name):
     """Получает список валют, которые встречаются в более чем в 5000 вакансий
@@ -9,41 +15,124 @@ def get_currency(file_name):
     Returns:
         list: Словарь валют
     """
-    df = pd.read_csv(file_name)
+    df = csv_cache.read_csv(file_name)
     currency_dict = df['salary_currency'].value_counts().to_dict()
     currency_dict = {k: v for k, v in currency_dict.items() if v >= 5000}
     return currency_dict
 
 
-def get_years_currency(file_name):
+def get_months(first_date, last_date):
+    """Получает все месяцы между двумя датами включительно
+    Args:
+        first_date (str): Самая ранняя дата в формате ГГГГ-ММ...
+        last_date (str): Самая поздняя дата в формате ГГГГ-ММ...
+    Returns:
+        list: Пары (год, месяц)
+    """
+    first_year, first_month = map(int, first_date.split("-")[:2])
+    last_year, last_month = map(int, last_date.split("-")[:2])
+    return [(index // 12, index % 12 + 1) for index in range(first_year * 12 + first_month - 1,
+                                                               last_year * 12 + last_month)]
+
+
+def get_valutes(content):
+    """Разбирает ответ ЦБ и проверяет, что в нем есть курсы валют
+    Args:
+        content (bytes): Ответ в формате xml
+    Returns:
+        list: Валюты ответа
+    Raises:
+        ValueError: Ответ не разбирается или в нем нет корня ValCurs с элементами Valute
+    """
+    try:
+        root = xmltodict.parse(content)
+    except Exception as error:
+        raise ValueError(f"Ответ ЦБ не разбирается: {error}")
+    valute = (root.get("ValCurs") or {}).get("Valute")
+    if not valute:
+        raise ValueError("В ответе ЦБ нет курсов валют")
+    return valute if isinstance(valute, list) else [valute]
+
+
+def get_month_xml(session, url, cache_dir, year, month, retries=3, backoff=1.0):
+    """Получает курсы валют ЦБ на первое число месяца. В кэш на диске по дате сохраняются только ответы
+    с курсами, поэтому повторный запуск скачивает только недостающие месяцы, а страницы ошибок ЦБ
+    не попадают в кэш. При ошибке запрос повторяется с экспоненциально растущей паузой
+    Args:
+        session (Session): Общая сессия requests с пулом соединений
+        url (str): Адрес XML_daily.asp
+        cache_dir (str): Папка кэша ответов
+        year (int): Год
+        month (int): Месяц
+        retries (int): Количество попыток
+        backoff (float): Пауза перед второй попыткой в секундах
+    Returns:
+        list: Валюты ответа или None, если все попытки не удались
+    """
+    cache_file = os.path.join(cache_dir, f"{year}-{str(month).zfill(2)}.xml")
+    if os.path.exists(cache_file):
+        with open(cache_file, "rb") as file:
+            content = file.read()
+        try:
+            return get_valutes(content)
+        except ValueError:
+            os.remove(cache_file)
+
+    for attempt in range(retries):
+        try:
+            response = session.get(url, params={"date_req": f"01/{str(month).zfill(2)}/{year}"}, timeout=30)
+            response.raise_for_status()
+            valutes = get_valutes(response.content)
+            break
+        except (requests.RequestException, ValueError):
+            if attempt == retries - 1:
+                return None
+            time.sleep(backoff * 2 ** attempt)
+
+    with open(cache_file + ".tmp", "wb") as file:
+        file.write(response.content)
+    os.replace(cache_file + ".tmp", cache_file)
+    return valutes
+
+
+def get_years_currency(file_name, url=CBR_URL, cache_dir="cbr_cache", max_workers=8):
     """Собирает курсы валют за диапазон между самой старой и новой вакансией с частотностью раз в месяц,
-     сохранет полученный результат (формат dataframe) в csv
+     сохранет полученный результат (формат dataframe) в csv. Месяцы запрашиваются параллельно
+     не более чем в max_workers потоков. Если курсы какого-то месяца получить не удалось, csv не записывается,
+     а полученные месяцы остаются в кэше для повторного запуска
     Args:
         file_name (str): Путь к файлу vacancies_dif_currencies.csv
+        url (str): Адрес XML_daily.asp
+        cache_dir (str): Папка кэша ответов ЦБ
+        max_workers (int): Максимальное количество одновременных запросов
+    Raises:
+        RuntimeError: Не удалось получить курсы части месяцев
     """
-    df = pd.read_csv(file_name)
-    res = pd.DataFrame()
-    df = df[df["salary_currency"].isin(list(get_currency(file_name).keys()))]
-    range_date = [df["published_at"].min().split("-")[:2], df["published_at"].max().split("-")[:2]]
-    row = {}
-    for y in range(int(range_date[0][0]), int(range_date[1][0]) + 1):
-        for month in range(int(range_date[0][1]), 13):
-            print(y, month)
-            try:
-                response = requests.get(fr"http://www.cbr.ru/scripts/XML_daily.asp?date_req=01/{str(month).zfill(2)}/{y}")
-            except Exception:
-                continue
-
-            response = xmltodict.parse(response.text)
-            for i in response['ValCurs']['Valute']:
-                if i['CharCode'] in list(get_currency(file_name).keys()):
-                    row["date"] = f"{y}-{month}".zfill(2)
-                    row[i['CharCode']] = round(float(i["Value"].replace(",", ".")) / int(i["Nominal"]), 7)
-            res = pd.concat([res, pd.DataFrame([row])])
-            if y == int(range_date[1][0]) and month == int(range_date[1][1]) or month == 12:
-                break
-
-    res.to_csv("currency.csv", index=False)
+    currency = list(get_currency(file_name).keys())
+    df = csv_cache.read_csv(file_name)
+    df = df[df["salary_currency"].isin(currency)]
+    months = get_months(df["published_at"].min(), df["published_at"].max())
+    os.makedirs(cache_dir, exist_ok=True)
+
+    with requests.Session() as session:
+        session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=max_workers))
+        session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=max_workers))
+        with con_fut.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            responses = list(executor.map(lambda m: get_month_xml(session, url, cache_dir, *m), months))
+
+    failed = [f"{y}-{str(month).zfill(2)}" for (y, month), valutes in zip(months, responses) if valutes is None]
+    if failed:
+        raise RuntimeError("Не удалось получить курсы ЦБ за месяцы: " + ", ".join(failed))
+
+    rows = []
+    for (y, month), valutes in zip(months, responses):
+        row = {"date": f"{y}-{str(month).zfill(2)}"}
+        for i in valutes:
+            if i["CharCode"] in currency:
+                row[i["CharCode"]] = round(float(i["Value"].replace(",", ".")) / int(i["Nominal"]), 7)
+        rows.append(row)
+
+    pd.DataFrame(rows).to_csv("currency.csv", index=False)
 
 def info_by_year(path):
     """
@@ -51,7 +140,7 @@ def info_by_year(path):
     Args:
         path (str): Путь к входному csv-файлу
     """
-    df = pd.read_csv(path)
+    df = csv_cache.read_csv(path)
     df["year"] = df["published_at"].apply(lambda x: x[:4])
     df = df.groupby("year")
     for y, info in df:
@@ -59,7 +148,7 @@ def info_by_year(path):
             to_csv(rf"Data\new_info_by_years\{y}_year.csv", index=False)
 
 
-info_by_year("Data/vacancies_dif_currencies.csv")
-
+if __name__ == '__main__':
+    info_by_year("Data/vacancies_dif_currencies.csv")
 
-get_years_currency('Data/vacancies_dif_currencies.csv')
+    get_years_currency('Data/vacancies_dif_currencies.csv')
@@ -1,73 +1,242 @@
-import requests
+import concurrent.futures as con_fut
+import csv
+import datetime
+import threading
 import time
-import pandas as pd
-import json
+import requests
+
+HH_URL = 'https://api.hh.ru/vacancies'
+DATE_FORMAT = "%Y-%m-%dT%H:%M:%S%z"
+columns = ['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at']
 
 
-def get_page(num_of_page, second_part_of_day):
-    """Получает ответ на запрос с api.hh.ru по сто вакансий за страницу
+class TokenBucket:
+    """Класс ограничителя частоты запросов по алгоритму token bucket, общий для всех потоков.
+
+    Attributes:
+        rate (float): Количество запросов в секунду
+        capacity (int): Максимальное количество запросов, которые можно сделать подряд без ожидания
+        tokens (float): Текущее количество доступных запросов
+        updated (float): Время последнего пополнения
+    """
+
+    def __init__(self, rate, capacity=1):
+        """Инициализирует объект TokenBucket.
+
+        Args:
+            rate (float): Количество запросов в секунду
+            capacity (int): Максимальное количество запросов подряд без ожидания
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Ждет, пока не станет доступен запрос, и забирает его
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def get_session(pool_size):
+    """Создает сессию requests с пулом соединений, которая переиспользуется всеми запросами
     Args:
+        pool_size (int): Размер пула соединений
+    Returns:
+        Session: Сессия requests
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_windows(date_from, date_to, hours=12):
+    """Делит промежуток времени на окна, чтобы в каждом было не больше вакансий, чем отдает api.hh.ru
+    Args:
+        date_from (str): Начало промежутка, например 2022-12-25T00:00:00+0300
+        date_to (str): Конец промежутка
+        hours (float): Длина одного окна в часах
+    Returns:
+        list: Пары (начало, конец) окон в формате api.hh.ru
+    """
+    start = datetime.datetime.strptime(date_from, DATE_FORMAT)
+    end = datetime.datetime.strptime(date_to, DATE_FORMAT)
+    step = datetime.timedelta(hours=hours)
+    windows = []
+    while start < end:
+        window_end = min(start + step, end)
+        last_second = window_end if window_end == end else window_end - datetime.timedelta(seconds=1)
+        windows.append((start.strftime(DATE_FORMAT), last_second.strftime(DATE_FORMAT)))
+        start = window_end
+    return windows
+
+
+def get_page(session, limiter, num_of_page, window, url=HH_URL, retries=5, backoff=1.0):
+    """Получает ответ на запрос с api.hh.ru по сто вакансий за страницу. При ошибке повторяет
+    запрос с экспоненциально растущей паузой
+    Args:
+        session (Session): Сессия requests с пулом соединений
+        limiter (TokenBucket): Ограничитель частоты запросов
         num_of_page (int): Номер страницы для выгрузки
-        second_part_of_day (int): Вакансии во второй половине дня
+        window (tuple): Начало и конец окна времени публикации
+        url (str): Адрес api.hh.ru/vacancies
+        retries (int): Количество попыток
+        backoff (float): Пауза перед второй попыткой в секундах
     Returns:
-        str: Список IT-вакансий в формате .json
+        dict: Список IT-вакансий из ответа в формате .json
     """
-    if not second_part_of_day:
-        parameters = {
-            "specialization": 1,
-            "found": 1,
-            "per_page": 100,
-            "page": num_of_page,
-            "date_from": "2022-12-25T00:00:00+0300",
-            "date_to": "2022-12-25T11:59:00+0300"
-        }
-    else:
-        parameters = {
-            "specialization": 1,
-            "found": 1,
-            "per_page": 100,
-            "page": num_of_page,
-            "date_from": "2022-12-25T12:00:00+0300",
-            "date_to": "2022-12-25T23:59:00+0300"
-        }
-    try:
-        request = requests.get('https://api.hh.ru/vacancies', parameters)
-        info = request.content.decode()
-        request.close()
+    parameters = {
+        "specialization": 1,
+        "found": 1,
+        "per_page": 100,
+        "page": num_of_page,
+        "date_from": window[0],
+        "date_to": window[1]
+    }
+    for attempt in range(retries):
+        limiter.acquire()
+        try:
+            response = session.get(url, params=parameters, timeout=30)
+            response.raise_for_status()
+            return response.json()
+        except (requests.RequestException, ValueError):
+            if attempt == retries - 1:
+                raise
+            print("Неуспешный запрос")
+            time.sleep(backoff * 2 ** attempt)
 
-    except:
-        print("Неуспешный запрос")
-        return get_page(num_of_page)
 
-    print("Успешный запрос")
-    return info
+def get_rows(js_obj):
+    """Получает строки для выходного файла из одной страницы ответа
+    Args:
+        js_obj (dict): Страница ответа api.hh.ru
+    Returns:
+        list: Строки с колонками columns
+    """
+    rows = []
+    for r in js_obj['items']:
+        salary = r['salary'] or {}
+        rows.append([r['name'], salary.get('from'), salary.get('to'), salary.get('currency'),
+                     r['area']['name'], r['published_at']])
+    return rows
 
 
-def set_vacancies():
-    """Собирает и сохраняет в csv-файл данные о вакансиях с api.hh.ru
+def get_pages(session, limiter, executor, window, url):
+    """Получает все страницы одного окна: первая страница сообщает их количество,
+    остальные запрашиваются параллельно
+    Args:
+        session (Session): Сессия requests с пулом соединений
+        limiter (TokenBucket): Ограничитель частоты запросов
+        executor (ThreadPoolExecutor): Пул потоков для запросов
+        window (tuple): Начало и конец окна времени публикации
+        url (str): Адрес api.hh.ru/vacancies
+    Returns:
+        dict: Страницы окна по порядку
     """
-    df = pd.DataFrame(columns=['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at'])
-    result = []
-    for half in range(2):
-        for page in range(0, 999):
-            js_obj = json.loads(get_page(page, half))
-            result.append(js_obj)
-            if (js_obj['pages'] - page) <= 1:
-                break
-            time.sleep(1)
-
-    for vac in result:
-        for r in vac['items']:
-            if r['salary'] is not None:
-                df.loc[len(df)] = [r['name'], r['salary']['from'],
-                                   r['salary']['to'], r['salary']['currency'],
-                                   r['area']['name'], r['published_at']]
-            else:
-                df.loc[len(df)] = [r['name'], None,
-                                   None, None,
-                                   r['area']['name'], r['published_at']]
-
-    df.to_csv("HHru_vacancies.csv", index=False)
-
-
-set_vacancies()
\ No newline at end of file
+    first_page = get_page(session, limiter, 0, window, url)
+    yield first_page
+    yield from executor.map(lambda page: get_page(session, limiter, page, window, url),
+                            range(1, first_page['pages']))
+
+
+class VacanciesWriter:
+    """Класс для потоковой записи вакансий пачками в csv или parquet (по расширению файла).
+
+    Attributes:
+        file_name (str): Путь к выходному файлу
+        batch_size (int): Количество строк в одной пачке
+        batch (list): Строки текущей пачки
+    """
+
+    def __init__(self, file_name, batch_size=1000):
+        """Инициализирует объект VacanciesWriter и записывает заголовок.
+
+        Args:
+            file_name (str): Путь к выходному файлу
+            batch_size (int): Количество строк в одной пачке
+        """
+        self.file_name = file_name
+        self.batch_size = batch_size
+        self.batch = []
+        if file_name.endswith('.parquet'):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            self.schema = pa.schema([('name', pa.string()), ('salary_from', pa.float64()),
+                                     ('salary_to', pa.float64()), ('salary_currency', pa.string()),
+                                     ('area_name', pa.string()), ('published_at', pa.string())])
+            self.writer = pq.ParquetWriter(file_name, self.schema)
+        else:
+            self.file = open(file_name, mode='w', encoding='utf-8', newline='')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(columns)
+
+    def write(self, rows):
+        """Добавляет строки, записывая их в файл по мере заполнения пачки
+        Args:
+            rows (list): Строки с колонками columns
+        """
+        self.batch += rows
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Записывает текущую пачку в файл
+        """
+        if not self.batch:
+            return
+        if self.file_name.endswith('.parquet'):
+            import pyarrow as pa
+            self.writer.write_table(pa.Table.from_pylist([dict(zip(columns, row)) for row in self.batch],
+                                                         schema=self.schema))
+        else:
+            self.writer.writerows(self.batch)
+        self.batch = []
+
+    def close(self):
+        """Записывает остаток и закрывает файл
+        """
+        self.flush()
+        if self.file_name.endswith('.parquet'):
+            self.writer.close()
+        else:
+            self.file.close()
+
+
+def set_vacancies(date_from="2022-12-25T00:00:00+0300", date_to="2022-12-25T23:59:00+0300",
+                  file_name="HHru_vacancies.csv", window_hours=12, max_workers=4, rate=2.0, url=HH_URL):
+    """Собирает и сохраняет в csv-файл (или parquet) данные о вакансиях с api.hh.ru за произвольный промежуток.
+    Страницы запрашиваются параллельно с ограничением частоты, строки пишутся в файл пачками по мере получения
+    Args:
+        date_from (str): Начало промежутка
+        date_to (str): Конец промежутка
+        file_name (str): Путь к выходному файлу .csv или .parquet
+        window_hours (float): Длина одного окна запросов в часах
+        max_workers (int): Количество одновременных запросов
+        rate (float): Максимальное количество запросов в секунду
+        url (str): Адрес api.hh.ru/vacancies
+    """
+    limiter = TokenBucket(rate)
+    writer = VacanciesWriter(file_name)
+    try:
+        with get_session(max_workers) as session, con_fut.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for window in get_windows(date_from, date_to, window_hours):
+                for js_obj in get_pages(session, limiter, executor, window, url):
+                    writer.write(get_rows(js_obj))
+    finally:
+        writer.close()
+
+
+if __name__ == '__main__':
+    set_vacancies()
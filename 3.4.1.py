@@ -1,49 +1,44 @@
-import pandas as pd
-from math import isnan
+import csv_cache
+from currency_rates import CurrencyRates
 
-def converting_salaries_in_rubles(row):
-    """Переводит значение salary в рубли после сравнения даты появления вакансии
-    с датой в файле currency.csv
+def converting_salaries_in_rubles(df, rates):
+    """Переводит значения salary в рубли по курсу месяца появления вакансии из файла currency.csv
     Args:
-        row (Series): Строка в data_file
+        df (DataFrame): Вакансии с колонками salary, salary_currency, published_at
+        rates (CurrencyRates): Таблица курсов валют, загруженная один раз
     Returns:
-        float: Значение для ячейки 'salary' в рублях
+        Series: Значения для колонки 'salary' в рублях
     """
-    converter = pd.read_csv("currency.csv")
-    if row["salary_currency"] in converter.columns:
-        answer = row["salary"] * float(converter[converter["date"] == row["published_at"][:7]][row["salary_currency"]])
-        return round(answer, 2)
-    return row["salary"]
+    return rates.convert(df["salary"], df["salary_currency"], df["published_at"])
 
 
-def get_avg_salary(row):
-    """Возвращает значение для поля salary в зависимости от заполненности полей salary_from, salary_to
+def get_avg_salary(df):
+    """Возвращает значения для колонки salary в зависимости от заполненности полей salary_from, salary_to
     Args:
-        row (Series): Строка в data_file
+        df (DataFrame): Вакансии с колонками salary_from, salary_to
     Returns:
-        float: Значение для ячейки 'salary'
+        Series: Значения для колонки 'salary'
     """
-    avg_values = []
-    avg_values += [row["salary_from"]] if not isnan(row["salary_from"]) else []
-    avg_values += [row["salary_to"]] if not isnan(row["salary_to"]) else []
-    if len(avg_values) != 0:
-        return sum(avg_values) / len(avg_values)
-    return
+    return df[["salary_from", "salary_to"]].mean(axis=1)
 
 
-def get_conversion(filename):
+def get_conversion(filename, output="100_vac.csv", rows=100, rates_path="currency.csv"):
     """Обрабатывает данные из колонок salary_from, salary_to, salary_currency и объединяет в колонку salary
     Args:
         filename: Путь к файлу vacancies_dif_currencies.csv
+        output (str): Путь к выходному csv-файлу
+        rows (int): Количество первых строк, None - все строки
+        rates_path (str): Путь к файлу с курсами валют
     """
-    data_file = pd.read_csv(filename)
-    result = data_file.loc[0:99].copy()
-    result["salary"] = result.apply(lambda r: get_avg_salary(r), axis=1)
-    result["salary"] = result.apply(lambda r: converting_salaries_in_rubles(r), axis=1)
+    data_file = csv_cache.read_csv(filename)
+    result = (data_file if rows is None else data_file.loc[0:rows - 1]).copy()
+    result["salary"] = get_avg_salary(result)
+    result["salary"] = converting_salaries_in_rubles(result, CurrencyRates.from_csv(rates_path))
     result.drop(labels=["salary_from", "salary_to", "salary_currency"], axis=1, inplace=True)
     result = result[["name", "salary", "area_name", "published_at"]]
 
-    result.to_csv("100_vac.csv", index=False)
+    result.to_csv(output, index=False)
 
 
-get_conversion('Data/vacancies_dif_currencies.csv')
\ No newline at end of file
+if __name__ == '__main__':
+    get_conversion('Data/vacancies_dif_currencies.csv')
\ No newline at end of file
@@ -1,13 +1,13 @@
-import pandas as pd
-import sqlite3
+from sqlite_loader import load_currency_csv
 
 
 def get_sql():
     """
-    Переводит csv-файл в таблицу sqlite3.
+    Переводит csv-файл в таблицу sqlite3. Строки загружаются потоком в таблицу с первичным ключом по дате,
+    уже загруженные месяцы обновляются, поэтому таблица не пересоздается при каждом запуске.
     """
-    df = pd.read_csv('currency.csv')
-    df.to_sql('currency', sqlite3.connect('currency.sqlite'), if_exists='replace', index=False)
+    load_currency_csv('currency.csv', 'currency.sqlite')
 
 
-get_sql()
\ No newline at end of file
+if __name__ == '__main__':
+    get_sql()
\ No newline at end of file
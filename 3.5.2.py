@@ -1,43 +1,28 @@
-import pandas as pd
-from math import isnan
 import sqlite3
+import csv_cache
+from currency_rates import CurrencyRates
 
 
-def get_avg_salary(row):
-    """Возвращает значение для поля salary в зависимости от заполненности полей salary_from, salary_to
+def get_avg_salary(df):
+    """Возвращает значения для колонки salary в зависимости от заполненности полей salary_from, salary_to
     Args:
-        row (Series): Строка в data_file
+        df (DataFrame): Вакансии с колонками salary_from, salary_to
     Returns:
-        float: Значение для ячейки 'salary'
+        Series: Значения для колонки 'salary'
     """
-    avg_values = []
+    return df[["salary_from", "salary_to"]].mean(axis=1)
 
-    avg_values += [row["salary_from"]] if not isnan(row["salary_from"]) else []
-    avg_values += [row["salary_to"]] if not isnan(row["salary_to"]) else []
-    if len(avg_values) != 0:
-        return sum(avg_values) / len(avg_values)
-    return
 
-
-def converter_salaries_in_rubles(row):
-    """Конвертирует salary в рубли после сравнения даты появления вакансии
-    с датой в файле currencies.db
+def converter_salaries_in_rubles(df, rates):
+    """Конвертирует salary в рубли по курсу месяца появления вакансии. Таблица курсов считывается
+    из базы один раз, перевод всей колонки делается векторно
     Args:
-        row (Series): Строка в data_file
+        df (DataFrame): Вакансии с колонками salary, salary_currency, published_at
+        rates (CurrencyRates): Таблица курсов валют из currency.sqlite
     Returns:
-        float: Значение для ячейки 'salary' в рублях
+        Series: Значения для колонки 'salary' в рублях
     """
-    result = []
-    exchange = sqlite3.connect("currencies.db")
-    cur = exchange.cursor()
-    cur.execute("SELECT name FROM PRAGMA_TABLE_INFO('currency');")
-    for i in cur.fetchall():
-        result.append(i[0])
-    if row["salary_currency"] in result:
-        cur.execute(f"SELECT {row['salary_currency']} FROM currency WHERE Date = ?", (row["published_at"][:7],))
-        result = row["salary"] * float(cur.fetchone()[0])
-        return round(result, 2)
-    return row["salary"]
+    return rates.convert(df["salary"], df["salary_currency"], df["published_at"])
 
 
 def currency_converter(filename):
@@ -45,13 +30,14 @@ def currency_converter(filename):
     Args:
         filename: Путь к файлу vacancies_dif_currencies.csv
     """
-    df = pd.read_csv(filename)
-    df["salary"] = df.apply(lambda row: get_avg_salary(row), axis=1)
-    df["salary"] = df.apply(lambda row: converter_salaries_in_rubles(row), axis=1)
+    df = csv_cache.read_csv(filename)
+    df["salary"] = get_avg_salary(df)
+    df["salary"] = converter_salaries_in_rubles(df, CurrencyRates.from_sqlite("currency.sqlite"))
     df.drop(labels=["salary_from", "salary_to", "salary_currency"], axis=1, inplace=True)
     df = df[["name", "salary", "area_name", "published_at"]]
     cnx = sqlite3.connect("vacan.db")
     df.to_sql("vacan", con=cnx, index=False)
 
 
-currency_converter('Data/vacancies_dif_currencies.csv')
\ No newline at end of file
+if __name__ == '__main__':
+    currency_converter('Data/vacancies_dif_currencies.csv')
\ No newline at end of file
@@ -0,0 +1,467 @@
+import argparse
+import contextlib
+import csv
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import tasks
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+sizes = {"10k": 10_000, "1M": 1_000_000, "10M": 10_000_000}
+columns = ["name", "salary_from", "salary_to", "salary_currency", "area_name", "published_at"]
+cities = {"Москва": 0.33, "Санкт-Петербург": 0.12, "Новосибирск": 0.035, "Екатеринбург": 0.035, "Казань": 0.03,
+          "Нижний Новгород": 0.025, "Краснодар": 0.02, "Самара": 0.018, "Ростов-на-Дону": 0.018, "Минск": 0.017,
+          "Воронеж": 0.015, "Алматы": 0.012, "Киев": 0.01, "Ташкент": 0.006, "Баку": 0.004, "Тбилиси": 0.003}
+currencies = {"RUR": 0.905, "USD": 0.035, "EUR": 0.015, "KZT": 0.017, "UAH": 0.01, "BYR": 0.01, "UZS": 0.004,
+              "AZN": 0.002, "GEL": 0.001, "KGS": 0.001}
+professions = ["Программист", "Аналитик", "Разработчик", "Тестировщик", "Менеджер проектов", "Дизайнер",
+               "Системный администратор", "Инженер", "Оператор", "Стажер"]
+grades = ["", "Младший ", "Старший ", "Ведущий ", "Главный "]
+specializations = ["", " Python", " Java", " 1С", " C++", " PHP", " данных", " DevOps", " баз данных"]
+benchmark_variants = {}
+
+
+def variant(name):
+    """Регистрирует функцию как вариант конвейера для замера
+
+    Args:
+        name (str): Название варианта
+    Returns:
+        function: Декоратор
+    """
+    def register(function):
+        benchmark_variants[name] = function
+        return function
+    return register
+
+
+class Stages:
+    """Класс для замера времени этапов одного запуска.
+
+    Attributes:
+        timings (dict): Время каждого этапа в секундах
+    """
+
+    def __init__(self):
+        """Инициализирует объект Stages.
+        """
+        self.timings = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Замеряет время выполнения блока
+
+        Args:
+            name (str): Название этапа
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0) + time.perf_counter() - start
+
+
+def generate_vacancies(file_name, rows, seed=1, chunk_size=100_000):
+    """Создает csv-файл с синтетическими вакансиями в формате выгрузки hh.ru.
+
+    Города и валюты выбираются по долям, похожим на настоящие данные, остальные города образуют длинный хвост;
+    количество вакансий растет от 2003 к 2022 году; зарплаты распределены логнормально и переведены в валюту
+    вакансии, у части вакансий нет нижней или верхней границы.
+
+    Args:
+        file_name (str): Путь к выходному csv-файлу
+        rows (int): Количество вакансий
+        seed (int): Начальное значение генератора случайных чисел
+        chunk_size (int): Количество строк, которые создаются и записываются за один раз
+    """
+    rng = np.random.default_rng(seed)
+    city_names = np.array(list(cities) + ["Город {0}".format(i) for i in range(1, 401)])
+    tail_weights = 1 / np.arange(1, 401)
+    tail_weights *= (1 - sum(cities.values())) / tail_weights.sum()
+    city_weights = np.concatenate([list(cities.values()), tail_weights])
+    currency_names = np.array(list(currencies))
+    currency_weights = np.array(list(currencies.values()))
+    currency_weights /= currency_weights.sum()
+    currency_to_rub = tasks.load("2.1.3").currency_to_rub
+    currency_rates = np.array([currency_to_rub[currency] for currency in currency_names])
+    titles = np.array([grade + profession + specialization for grade in grades for profession in professions
+                       for specialization in specializations])
+    years = np.arange(2003, 2023)
+    year_weights = np.linspace(1, 6, len(years))
+    year_weights /= year_weights.sum()
+
+    temp_name = file_name + ".tmp"
+    with open(temp_name, mode="w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(columns)
+        for start in range(0, rows, chunk_size):
+            size = min(chunk_size, rows - start)
+            currency = rng.choice(len(currency_names), size, p=currency_weights)
+            salary = rng.lognormal(np.log(60000), 0.5, size) / currency_rates[currency]
+            salary_from = np.round(salary)
+            salary_to = np.round(salary * rng.uniform(1, 1.6, size))
+            bounds = rng.random(size)
+            salary_from = np.where(bounds < 0.15, np.nan, salary_from)
+            salary_to = np.where((bounds >= 0.15) & (bounds < 0.35), np.nan, salary_to)
+            published_at = ["{0}-{1:02}-{2:02}T{3:02}:{4:02}:{5:02}+0300".format(*values) for values in zip(
+                rng.choice(years, size, p=year_weights).tolist(), rng.integers(1, 13, size).tolist(),
+                rng.integers(1, 29, size).tolist(), rng.integers(0, 24, size).tolist(),
+                rng.integers(0, 60, size).tolist(), rng.integers(0, 60, size).tolist())]
+            writer.writerows(zip(
+                titles[rng.integers(0, len(titles), size)].tolist(),
+                ["" if np.isnan(value) else int(value) for value in salary_from.tolist()],
+                ["" if np.isnan(value) else int(value) for value in salary_to.tolist()],
+                currency_names[currency].tolist(),
+                city_names[rng.choice(len(city_names), size, p=city_weights)].tolist(),
+                published_at))
+    os.replace(temp_name, file_name)
+
+
+def get_data_file(data_dir, rows, seed=1):
+    """Возвращает путь к синтетическому файлу нужного размера, создавая его при первом обращении
+
+    Args:
+        data_dir (str): Папка с синтетическими файлами
+        rows (int): Количество вакансий
+        seed (int): Начальное значение генератора случайных чисел
+    Returns:
+        str: Путь к csv-файлу
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    file_name = os.path.join(data_dir, "vacancies_{0}_{1}.csv".format(rows, seed))
+    if not os.path.exists(file_name):
+        generate_vacancies(file_name, rows, seed)
+    return file_name
+
+
+def count_rows(file_name):
+    """Считает количество вакансий в csv-файле
+
+    Args:
+        file_name (str): Путь к csv-файлу
+    Returns:
+        int: Количество строк без заголовка
+    """
+    with open(file_name, mode="rb") as file:
+        return sum(chunk.count(b"\n") for chunk in iter(lambda: file.read(1 << 20), b"")) - 1
+
+
+def clear_caches(file_name):
+    """Удаляет кэши, которые модули создают рядом с входным файлом, чтобы каждый запуск начинался с холодного диска
+
+    Args:
+        file_name (str): Путь к csv-файлу
+    """
+    for suffix in (".feather", ".stats.json", ".monthly.stats.json", ".db", ".db-wal", ".db-shm"):
+        if os.path.exists(file_name + suffix):
+            os.remove(file_name + suffix)
+    shutil.rmtree(file_name + ".index", ignore_errors=True)
+
+
+def run_solution(stages, file_name, profession, backend):
+    """Замеряет Solution из 3.2.3.py, который делит файл по годам и считает годы в режиме backend
+
+    Args:
+        stages (Stages): Замер этапов
+        file_name (str): Путь к csv-файлу
+        profession (str): Название профессии
+        backend (str): Режим выполнения статистики по годам
+    """
+    solve = tasks.load("3.2.3").Solution(file_name, profession, backend)
+    with stages.stage("split"):
+        solve.split_by_year()
+    with stages.stage("years"):
+        solve.get_stats_by_year()
+    with stages.stage("cities"):
+        solve.get_stats_by_city()
+
+
+@variant("solution_serial")
+def run_solution_serial(stages, file_name, profession):
+    """Solution: деление по годам, годы в одном процессе
+    """
+    run_solution(stages, file_name, profession, "serial")
+
+
+@variant("solution_thread")
+def run_solution_thread(stages, file_name, profession):
+    """Solution: деление по годам, годы в пуле потоков
+    """
+    run_solution(stages, file_name, profession, "thread")
+
+
+@variant("solution_process")
+def run_solution_process(stages, file_name, profession):
+    """Solution: деление по годам, каждый год отдельной задачей в пуле процессов
+    """
+    run_solution(stages, file_name, profession, "process")
+
+
+@variant("solution_chunked")
+def run_solution_chunked(stages, file_name, profession):
+    """Solution: деление по годам, небольшие годы пачками в пуле процессов
+    """
+    run_solution(stages, file_name, profession, "chunked-process")
+
+
+@variant("solution_in_memory")
+def run_solution_in_memory(stages, file_name, profession):
+    """Solution: одно чтение файла, деление по годам в памяти
+    """
+    solve = tasks.load("3.2.3").Solution(file_name, profession)
+    with stages.stage("stats"):
+        solve.get_stats_in_memory()
+
+
+@variant("solution_warehouse")
+def run_solution_warehouse(stages, file_name, profession):
+    """Solution: загрузка в хранилище sqlite3 и запросы GROUP BY
+    """
+    module = tasks.load("3.2.3")
+    with stages.stage("load"):
+        module.VacancyWarehouse.open(file_name).close()
+    with stages.stage("stats"):
+        module.Solution(file_name, profession).get_stats(from_warehouse=True)
+
+
+@variant("solution_sketch")
+def run_solution_sketch(stages, file_name, profession):
+    """Solution: одно чтение файла, города скетчем SpaceSaving
+    """
+    solve = tasks.load("3.2.3").Solution(file_name, profession)
+    with stages.stage("stats"):
+        solve.get_stats(in_memory=True, sketched=True)
+
+
+def run_dataset(stages, file_name, profession, rates=None, sketched=False, **kwargs):
+    """Замеряет DataSet из 2.1.3.py
+
+    Args:
+        stages (Stages): Замер этапов
+        file_name (str): Путь к csv-файлу
+        profession (str): Название профессии
+        rates (CurrencyRates): Таблица курсов валют по месяцам
+        sketched (bool): Считать города и квантили зарплат скетчами
+        kwargs: Режим чтения для DataSet.get_dynamics
+    """
+    dataset = tasks.load("2.1.3").DataSet(file_name, profession, rates, sketched)
+    with stages.stage("dynamics"):
+        dataset.get_dynamics(**kwargs)
+
+
+@variant("dataset")
+def run_dataset_serial(stages, file_name, profession):
+    """DataSet: построчное чтение в одном процессе
+    """
+    run_dataset(stages, file_name, profession)
+
+
+@variant("dataset_shards")
+def run_dataset_shards(stages, file_name, profession):
+    """DataSet: чтение файла частями во всех ядрах
+    """
+    run_dataset(stages, file_name, profession, processes=None)
+
+
+@variant("dataset_mmap")
+def run_dataset_mmap(stages, file_name, profession):
+    """DataSet: разбор строк в байтах отображенного в память файла
+    """
+    run_dataset(stages, file_name, profession, by_mmap=True)
+
+
+@variant("dataset_columns")
+def run_dataset_columns(stages, file_name, profession):
+    """DataSet: колоночное чтение через pyarrow
+    """
+    run_dataset(stages, file_name, profession, by_columns=True)
+
+
+@variant("dataset_rates")
+def run_dataset_rates(stages, file_name, profession):
+    """DataSet: разбор в байтах с переводом зарплат по курсу месяца публикации из currency.csv
+    """
+    from currency_rates import CurrencyRates
+
+    with stages.stage("rates"):
+        rates = CurrencyRates.from_csv(os.path.join(tasks.tasks_dir, "currency.csv"))
+    run_dataset(stages, file_name, profession, by_mmap=True, rates=rates)
+
+
+@variant("dataset_warehouse")
+def run_dataset_warehouse(stages, file_name, profession):
+    """DataSet: загрузка в хранилище sqlite3 и запросы GROUP BY
+    """
+    module = tasks.load("2.1.3")
+    with stages.stage("load"):
+        module.VacancyWarehouse.open(file_name).close()
+    with stages.stage("dynamics"):
+        module.DataSet(file_name, profession).get_dynamics(from_warehouse=True)
+
+
+@variant("dataset_sketch")
+def run_dataset_sketch(stages, file_name, profession):
+    """DataSet: чтение файла частями во всех ядрах, города и медианы зарплат скетчами
+    """
+    dataset = tasks.load("2.1.3").DataSet(file_name, profession, sketched=True)
+    with stages.stage("quantiles"):
+        dataset.get_quantile_dynamics((0.5, 0.9), processes=None)
+
+
+@variant("dataset_indexed")
+def run_dataset_indexed(stages, file_name, profession):
+    """DataSet: построение триграммного индекса и запрос к нему
+    """
+    module = tasks.load("2.1.3")
+    with stages.stage("index"):
+        index = module.NameIndex.open(file_name)
+    with stages.stage("dynamics"):
+        module.DataSet.build_dynamics(index.get_statistic(profession))
+
+
+def get_peak_rss(who):
+    """Получает пиковый объем резидентной памяти в мегабайтах
+
+    Args:
+        who (int): resource.RUSAGE_SELF или resource.RUSAGE_CHILDREN
+    Returns:
+        float: Пиковый объем памяти или None, если модуль resource недоступен
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_variant(name, file_name, profession, profile_dir=None):
+    """Выполняет один вариант в текущем процессе и печатает результат в формате json.
+    Вызывается из run_benchmark в отдельном процессе, чтобы пиковая память не зависела от других вариантов
+
+    Args:
+        name (str): Название варианта
+        file_name (str): Путь к csv-файлу
+        profession (str): Название профессии
+        profile_dir (str): Папка для файлов cProfile, None - без профилирования
+    """
+    stages = Stages()
+    start = time.perf_counter()
+    if profile_dir is None:
+        benchmark_variants[name](stages, file_name, profession)
+    else:
+        import cProfile
+        os.makedirs(profile_dir, exist_ok=True)
+        profile = cProfile.Profile()
+        profile.runcall(benchmark_variants[name], stages, file_name, profession)
+        profile.dump_stats(os.path.join(profile_dir, name + ".prof"))
+    seconds = time.perf_counter() - start
+    print(json.dumps({"seconds": seconds, "stages": stages.timings,
+                      "peak_rss_mb": get_peak_rss(getattr(resource, "RUSAGE_SELF", None)),
+                      "children_peak_rss_mb": get_peak_rss(getattr(resource, "RUSAGE_CHILDREN", None))}))
+
+
+def run_benchmark(files, variants, profession="Программист", repeat=1, warm=False, profile_dir=None):
+    """Запускает каждый вариант на каждом файле в отдельном процессе и собирает результаты
+
+    Args:
+        files (list): Пути к csv-файлам
+        variants (list): Названия вариантов
+        profession (str): Название профессии
+        repeat (int): Количество запусков каждого варианта
+        warm (bool): Не удалять кэши рядом с входным файлом между запусками
+        profile_dir (str): Папка для файлов cProfile, None - без профилирования
+    Returns:
+        dict: Описание окружения и результаты запусков
+    """
+    results = []
+    for file_name in files:
+        file_name = os.path.abspath(file_name)
+        rows = count_rows(file_name)
+        for name in variants:
+            for attempt in range(repeat):
+                if not warm:
+                    clear_caches(file_name)
+                command = [sys.executable, os.path.abspath(__file__), "variant", name, file_name, profession]
+                if profile_dir is not None:
+                    command += ["--profile", os.path.abspath(profile_dir)]
+                with tempfile.TemporaryDirectory() as work_dir:
+                    output = subprocess.run(command, cwd=work_dir, check=True, capture_output=True,
+                                            text=True).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                result.update({"variant": name, "file": file_name, "rows": rows, "attempt": attempt,
+                               "rows_per_second": round(rows / result["seconds"])})
+                print("{0} {1} rows: {2:.2f} s".format(name, rows, result["seconds"]), file=sys.stderr)
+                results.append(result)
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count(),
+            "results": results}
+
+
+def get_rows(value):
+    """Переводит размер файла из аргументов командной строки в количество строк
+
+    Args:
+        value (str): Размер: 10k, 1M, 10M или число
+    Returns:
+        int: Количество строк
+    """
+    return sizes[value] if value in sizes else int(value)
+
+
+def main(argv=None):
+    """Разбирает аргументы командной строки и выполняет команду generate, run или variant
+
+    Args:
+        argv (list): Аргументы командной строки, по умолчанию sys.argv
+    """
+    parser = argparse.ArgumentParser(description="Замер скорости и памяти конвейеров статистики вакансий")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="создать синтетический csv-файл")
+    generate.add_argument("rows", type=get_rows, help="количество строк: 10k, 1M, 10M или число")
+    generate.add_argument("file_name")
+    generate.add_argument("--seed", type=int, default=1)
+
+    run = commands.add_parser("run", help="замерить варианты")
+    run.add_argument("--sizes", nargs="+", type=get_rows, default=[sizes["10k"]],
+                     help="размеры синтетических файлов: 10k, 1M, 10M или число")
+    run.add_argument("--files", nargs="+", default=[], help="готовые csv-файлы вместо синтетических")
+    run.add_argument("--variants", nargs="+", choices=list(benchmark_variants), default=list(benchmark_variants))
+    run.add_argument("--profession", default="Программист")
+    run.add_argument("--repeat", type=int, default=1)
+    run.add_argument("--warm", action="store_true", help="не удалять кэши между запусками")
+    run.add_argument("--data-dir", default="bench_data")
+    run.add_argument("--profile", help="папка для файлов cProfile")
+    run.add_argument("--output", help="файл для результатов в формате json, по умолчанию stdout")
+
+    one = commands.add_parser("variant", help="выполнить один вариант в текущем процессе")
+    one.add_argument("name", choices=list(benchmark_variants))
+    one.add_argument("file_name")
+    one.add_argument("profession")
+    one.add_argument("--profile")
+
+    args = parser.parse_args(argv)
+    if args.command == "generate":
+        generate_vacancies(args.file_name, args.rows, args.seed)
+    elif args.command == "variant":
+        run_variant(args.name, args.file_name, args.profession, args.profile)
+    else:
+        files = args.files or [get_data_file(args.data_dir, rows) for rows in args.sizes]
+        report = run_benchmark(files, args.variants, args.profession, args.repeat, args.warm, args.profile)
+        if args.output:
+            with open(args.output, mode="w", encoding="utf-8") as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        else:
+            print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
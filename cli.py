@@ -0,0 +1,152 @@
+import argparse
+import sys
+import tasks
+
+modes = ("rows", "mmap", "columns", "incremental", "indexed", "warehouse")
+
+
+def load_rates(path):
+    """Загружает таблицу курсов валют, если задан путь. pandas и numpy импортируются только здесь
+
+    Args:
+        path (str): Путь к currency.csv или currency.sqlite, None - без таблицы курсов
+    Returns:
+        CurrencyRates: Таблица курсов валют или None
+    """
+    if path is None:
+        return None
+    from currency_rates import CurrencyRates
+
+    return CurrencyRates.from_sqlite(path) if path.endswith((".sqlite", ".db")) else CurrencyRates.from_csv(path)
+
+
+def run_stats(args):
+    """Печатает динамики по файлу вакансий, как InputConnect, но без построения отчета
+
+    Args:
+        args (Namespace): Аргументы команды stats
+    """
+    module = tasks.load("2.1.3")
+    sketched = args.sketched or bool(args.quantiles)
+    dataset = module.DataSet(args.file_name, args.profession, load_rates(args.rates), sketched)
+    if args.quantiles:
+        names = ["Квантили {0} зарплат по годам: ", "Квантили {0} зарплат по годам для выбранной профессии: ",
+                 "Квантили {0} зарплат по городам: "]
+        quantiles = dataset.get_quantile_dynamics(tuple(args.quantiles), args.processes)
+        for name, dynamics in zip(names, quantiles):
+            print(name.format(args.quantiles) + "{0}".format(dynamics))
+        return
+    dataset.print_statistic(*dataset.get_dynamics(
+        by_columns=args.mode == "columns", processes=args.processes, incremental=args.mode == "incremental",
+        indexed=args.mode == "indexed", by_mmap=args.mode == "mmap", from_warehouse=args.mode == "warehouse"))
+
+
+def run_split(args):
+    """Делит файл вакансий на файлы по годам
+
+    Args:
+        args (Namespace): Аргументы команды split
+    """
+    tasks.load("3.2.3").Solution(args.file_name, None).split_by_year()
+
+
+def run_convert(args):
+    """Переводит зарплаты файла вакансий в рубли по курсу месяца публикации
+
+    Args:
+        args (Namespace): Аргументы команды convert
+    """
+    tasks.load("3.4.1").get_conversion(args.file_name, args.output, args.rows or None, args.rates)
+
+
+def run_harvest(args):
+    """Собирает вакансии с api.hh.ru в файл или, если задана профессия, сразу в динамики
+
+    Args:
+        args (Namespace): Аргументы команды harvest
+    """
+    if args.profession is None:
+        tasks.load("3.3.3").set_vacancies(args.date_from, args.date_to, args.output, args.window_hours,
+                                          args.max_workers, args.rate)
+        return
+    import asyncio
+    import ingest
+
+    asyncio.run(ingest.main(args.profession, args.date_from, args.date_to, args.output, args.window_hours,
+                            args.max_workers, args.rate, load_rates(args.rates)))
+
+
+def run_report(args):
+    """Печатает динамики и строит отчет в выбранных форматах
+
+    Args:
+        args (Namespace): Аргументы команды report
+    """
+    tasks.load("2.1.3").InputConnect(tuple(args.formats), load_rates(args.rates), args.file_name, args.profession)
+
+
+def main(argv=None):
+    """Разбирает аргументы командной строки и выполняет команду stats, split, convert, harvest или report.
+    Каждая команда импортирует только нужные ей скрипты и библиотеки
+
+    Args:
+        argv (list): Аргументы командной строки, по умолчанию sys.argv
+    """
+    parser = argparse.ArgumentParser(description="Статистика вакансий без интерактивного ввода")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    stats = commands.add_parser("stats", help="напечатать динамики по файлу вакансий")
+    stats.add_argument("file_name")
+    stats.add_argument("profession")
+    stats.add_argument("--mode", choices=modes, default="rows", help="способ чтения файла, см. DataSet.get_dynamics")
+    stats.add_argument("--processes", type=int, default=1, help="количество процессов, 0 - по количеству ядер")
+    stats.add_argument("--rates", help="currency.csv или currency.sqlite для перевода по курсу месяца")
+    stats.add_argument("--sketched", action="store_true", help="считать города скетчами фиксированного размера")
+    stats.add_argument("--quantiles", nargs="+", type=float, help="напечатать квантили зарплат, например 0.5 0.9")
+    stats.set_defaults(function=run_stats)
+
+    split = commands.add_parser("split", help="разделить файл вакансий по годам")
+    split.add_argument("file_name")
+    split.set_defaults(function=run_split)
+
+    convert = commands.add_parser("convert", help="перевести зарплаты в рубли по курсу месяца публикации")
+    convert.add_argument("file_name")
+    convert.add_argument("--output", default="100_vac.csv")
+    convert.add_argument("--rows", type=int, default=100, help="количество первых строк, 0 - все строки")
+    convert.add_argument("--rates", default="currency.csv")
+    convert.set_defaults(function=run_convert)
+
+    harvest = commands.add_parser("harvest", help="собрать вакансии с api.hh.ru")
+    harvest.add_argument("--date-from", default="2022-12-25T00:00:00+0300")
+    harvest.add_argument("--date-to", default="2022-12-25T23:59:00+0300")
+    harvest.add_argument("--output", default="HHru_vacancies.csv")
+    harvest.add_argument("--window-hours", type=float, default=12)
+    harvest.add_argument("--max-workers", type=int, default=4)
+    harvest.add_argument("--rate", type=float, default=2.0)
+    harvest.add_argument("--profession", help="считать динамики по профессии во время загрузки")
+    harvest.add_argument("--rates", help="currency.csv или currency.sqlite для перевода по курсу месяца, "
+                                         "только с --profession")
+    harvest.set_defaults(function=run_harvest)
+
+    report = commands.add_parser("report", help="напечатать динамики и построить отчет")
+    report.add_argument("file_name")
+    report.add_argument("profession")
+    report.add_argument("--formats", nargs="+", choices=("png", "xlsx", "pdf"), default=["png", "xlsx", "pdf"])
+    report.add_argument("--rates", help="currency.csv или currency.sqlite для перевода по курсу месяца")
+    report.set_defaults(function=run_report)
+
+    args = parser.parse_args(argv)
+    if getattr(args, "processes", 1) == 0:
+        args.processes = None
+    if args.command == "stats":
+        if args.mode == "indexed" and args.rates:
+            parser.error("--mode indexed нельзя совместить с --rates: в индексе по названиям нет месяцев публикации")
+        if (args.sketched or args.quantiles) and args.mode != "rows":
+            parser.error("--sketched и --quantiles считаются только с --mode rows")
+    if args.command == "harvest" and args.rates and args.profession is None:
+        parser.error("--rates нужен только для динамик, задайте --profession")
+    args.function(args)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,58 @@
+import os
+import pandas
+
+
+def get_cache_path(path):
+    """Возвращает путь к кэшу, который хранится рядом с исходным csv-файлом
+    Args:
+        path (str): Путь к csv-файлу
+    Returns:
+        str: Путь к файлу кэша в формате Feather
+    """
+    return path + ".feather"
+
+
+def get_source_version(path):
+    """Получает размер и время изменения исходного файла, по которым проверяется актуальность кэша
+    Args:
+        path (str): Путь к csv-файлу
+    Returns:
+        dict: Размер и время изменения файла
+    """
+    stat = os.stat(path)
+    return {b"source_size": str(stat.st_size).encode(), b"source_mtime": str(stat.st_mtime_ns).encode()}
+
+
+def read_csv(path):
+    """Считывает csv-файл с вакансиями через типизированный колоночный кэш.
+
+    При первом чтении файл разбирается pandas.read_csv и сохраняется рядом в формате Feather без сжатия.
+    Последующие чтения отображают кэш в память и не разбирают текст заново. Кэш пересобирается,
+    если у исходного файла изменился размер или время изменения. Без pyarrow файл просто считывается
+    pandas.read_csv.
+    Args:
+        path (str): Путь к csv-файлу
+    Returns:
+        DataFrame: Содержимое csv-файла
+    """
+    try:
+        import pyarrow
+        from pyarrow import feather
+    except ImportError:
+        return pandas.read_csv(path)
+
+    cache_path = get_cache_path(path)
+    version = get_source_version(path)
+    if os.path.exists(cache_path):
+        with pyarrow.memory_map(cache_path) as source:
+            metadata = pyarrow.ipc.open_file(source).schema.metadata or {}
+        if all(metadata.get(k) == v for k, v in version.items()):
+            return feather.read_table(cache_path, memory_map=True).to_pandas()
+
+    df = pandas.read_csv(path)
+    table = pyarrow.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), **version})
+    temp_path = cache_path + ".tmp"
+    feather.write_feather(table, temp_path, compression="uncompressed")
+    os.replace(temp_path, cache_path)
+    return df
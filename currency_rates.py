@@ -0,0 +1,128 @@
+import csv
+import sqlite3
+import numpy as np
+import pandas as pd
+
+
+class CurrencyRates:
+    """Класс таблицы курсов валют к рублю с точностью до месяца.
+
+    Курсы хранятся в массиве (месяц × валюта), поэтому перевод целой колонки зарплат
+    выполняется одной векторной выборкой по индексам месяца и валюты.
+
+    Attributes:
+        months (Index): Месяцы в формате ГГГГ-ММ
+        currencies (Index): Коды валют
+        rates (ndarray): Курсы валют, строка - месяц, столбец - валюта; последняя строка из NaN
+            используется для месяцев, которых нет в таблице
+        month_index (dict): Номер строки для каждого месяца
+        currency_index (dict): Номер столбца для каждой валюты
+    """
+
+    def __init__(self, months, currencies, rates):
+        """Инициализирует объект CurrencyRates.
+
+        Args:
+            months (list): Месяцы в формате ГГГГ-ММ
+            currencies (list): Коды валют
+            rates (list): Курсы валют по месяцам, в порядке months и currencies
+        """
+        self.months = pd.Index(months)
+        self.currencies = pd.Index(currencies)
+        self.rates = np.vstack([np.asarray(rates, dtype=float).reshape(len(months), len(currencies)),
+                                np.full(len(currencies), np.nan)])
+        self.month_index = dict(zip(months, range(len(months))))
+        self.currency_index = dict(zip(currencies, range(len(currencies))))
+
+    @classmethod
+    def from_csv(cls, path="currency.csv"):
+        """Загружает таблицу курсов из csv-файла с колонкой date и колонками валют
+
+        Args:
+            path (str): Путь к файлу с курсами валют
+        Returns:
+            CurrencyRates: Таблица курсов валют
+        """
+        with open(path, mode="r", encoding="utf-8-sig") as file:
+            reader = csv.reader(file)
+            header = next(reader)
+            months, rates = [], []
+            for row in reader:
+                months.append(row[0])
+                rates.append([float(value) if value else np.nan for value in row[1:]])
+        return cls(months, header[1:], rates)
+
+    @classmethod
+    def from_sqlite(cls, path="currency.sqlite", table="currency"):
+        """Загружает таблицу курсов из базы sqlite3 одним запросом через одно соединение
+
+        Args:
+            path (str): Путь к базе с курсами валют
+            table (str): Название таблицы с колонкой date и колонками валют
+        Returns:
+            CurrencyRates: Таблица курсов валют
+        """
+        connection = sqlite3.connect(path)
+        try:
+            cursor = connection.execute(f'SELECT * FROM "{table}"')
+            header = [column[0] for column in cursor.description]
+            rows = cursor.fetchall()
+        finally:
+            connection.close()
+
+        date_index = [column.lower() for column in header].index("date")
+        currencies = [column for i, column in enumerate(header) if i != date_index]
+        months = [row[date_index] for row in rows]
+        rates = [[np.nan if value is None else float(value) for i, value in enumerate(row) if i != date_index]
+                 for row in rows]
+        return cls(months, currencies, rates)
+
+    def get_rate(self, currency, month):
+        """Получает курс одной валюты за один месяц
+
+        Args:
+            currency (str): Код валюты
+            month (str): Месяц в формате ГГГГ-ММ
+        Returns:
+            float: Курс валюты или None, если валюты или месяца нет в таблице или курс не указан
+        """
+        currency_index = self.currency_index.get(currency)
+        if currency_index is None:
+            return None
+        rate = float(self.rates[self.month_index.get(month, -1), currency_index])
+        return None if np.isnan(rate) else rate
+
+    def get_rates(self, currency, published_at):
+        """Получает курсы для каждой вакансии одной векторной выборкой
+
+        Args:
+            currency (Series): Валюты зарплат
+            published_at (Series): Даты публикации вакансий
+        Returns:
+            ndarray, ndarray: Курсы валют и маска вакансий, валюта которых есть в таблице
+        """
+        currency_index = self.currencies.get_indexer(currency)
+        month_index = self.months.get_indexer(published_at.str[:7])
+        known = currency_index != -1
+        rates = np.ones(len(currency_index))
+        rates[known] = self.rates[month_index[known], currency_index[known]]
+        return rates, known
+
+    def convert(self, salary, currency, published_at):
+        """Переводит зарплаты в рубли по курсу месяца публикации вакансии.
+
+        Зарплаты в валютах, которых нет в таблице (в том числе в рублях), не меняются;
+        для месяцев, которых нет в таблице, получается NaN. Округление до копеек делается встроенным round,
+        который, в отличие от np.round, не дает ошибок на половинах копейки.
+
+        Args:
+            salary (Series): Зарплаты в валюте вакансии
+            currency (Series): Валюты зарплат
+            published_at (Series): Даты публикации вакансий
+        Returns:
+            Series: Зарплаты в рублях
+        """
+        rates, known = self.get_rates(currency, published_at)
+        result = salary.to_numpy(dtype=float, copy=True)
+        result[known] = [round(value, 2) for value in (result[known] * rates[known]).tolist()]
+        return pd.Series(result, index=salary.index)
@@ -0,0 +1,279 @@
+import asyncio
+import concurrent.futures as con_fut
+import copy
+import tasks
+
+vacancies_module = tasks.load("2.1.3")
+harvest_module = tasks.load("3.3.3")
+
+
+class IngestionPipeline:
+    """Класс потоковой загрузки вакансий с api.hh.ru сразу в статистику, без промежуточного csv-файла.
+
+    Этапы работают одновременно в одном цикле asyncio и связаны очередями ограниченного размера:
+    загрузка страниц -> разбор страниц в строки -> перевод строк в вакансии -> накопление сумм по годам,
+    городам и профессии. Суммы ведутся по валютам (с таблицей курсов - по валютам и месяцам) и переводятся
+    в рубли только при получении динамик, как в DataSet. Страницы запрашиваются функцией get_page из 3.3.3.py
+    в пуле потоков, не больше max_workers одновременно и с ограничением частоты TokenBucket. Если следующий
+    этап не успевает, очередь заполняется и предыдущий этап ждет (обратное давление), поэтому в памяти
+    находится не больше queue_size пачек на этап. Загрузка не ждет накопления каждой страницы, а накопление
+    не ждет конца загрузки: динамики можно получить методом get_dynamics в любой момент. Статистику изменяет
+    только этап накопления в цикле asyncio, пачка добавляется без await, поэтому внутри цикла статистика
+    всегда согласована, а другой поток получает ее копию, снятую в цикле между пачками (get_snapshot).
+    Если задан file_name, строки еще и пишутся в файл, как в set_vacancies.
+
+    Attributes:
+        vacancy_name (str): Название выбранной профессии
+        rates (CurrencyRates): Таблица курсов валют по месяцам, без нее используются курсы currency_to_rub
+        sketched (bool): Считать города и квантили зарплат скетчами фиксированного размера
+        queue_size (int): Размер очередей между этапами
+        max_workers (int): Количество одновременных запросов
+        rate (float): Максимальное количество запросов в секунду
+        url (str): Адрес api.hh.ru/vacancies
+        file_name (str): Путь к файлу .csv или .parquet для сохранения строк, None - не сохранять
+        statistic (Statistic): Накопленная статистика
+        loop (AbstractEventLoop): Цикл asyncio, в котором идет загрузка, None - загрузка не идет
+        counters (dict): Количество страниц, строк, вакансий и пропущенных строк
+    """
+
+    def __init__(self, vacancy_name, rates=None, sketched=False, queue_size=100, max_workers=4, rate=2.0,
+                 url=harvest_module.HH_URL, file_name=None):
+        """Инициализирует объект IngestionPipeline.
+
+        Args:
+            vacancy_name (str): Название выбранной профессии
+            rates (CurrencyRates): Таблица курсов валют по месяцам
+            sketched (bool): Считать города и квантили зарплат скетчами фиксированного размера
+            queue_size (int): Размер очередей между этапами
+            max_workers (int): Количество одновременных запросов
+            rate (float): Максимальное количество запросов в секунду
+            url (str): Адрес api.hh.ru/vacancies
+            file_name (str): Путь к файлу для сохранения строк
+        """
+        self.vacancy_name = vacancy_name
+        self.rates = rates
+        self.sketched = sketched
+        self.queue_size = queue_size
+        self.max_workers = max_workers
+        self.rate = rate
+        self.url = url
+        self.file_name = file_name
+        self.statistic = vacancies_module.DataSet(None, vacancy_name, rates, sketched).new_statistic()
+        self.loop = None
+        self.counters = {"pages": 0, "rows": 0, "vacancies": 0, "skipped": 0}
+
+    async def fetch(self, windows, pages):
+        """Этап загрузки: запрашивает все страницы окон и кладет их в очередь. Первая страница окна сообщает
+        количество страниц, остальные страницы окна добавляются в задания, которые разбирают max_workers
+        исполнителей
+
+        Args:
+            windows (list): Окна времени публикации, результат get_windows
+            pages (Queue): Очередь страниц
+        """
+        loop = asyncio.get_running_loop()
+        jobs = asyncio.Queue()
+        for window in windows:
+            jobs.put_nowait((window, 0))
+        limiter = harvest_module.TokenBucket(self.rate)
+
+        async def worker():
+            while True:
+                window, page = await jobs.get()
+                try:
+                    js_obj = await loop.run_in_executor(executor, harvest_module.get_page, session, limiter,
+                                                        page, window, self.url)
+                    if page == 0:
+                        for next_page in range(1, js_obj["pages"]):
+                            jobs.put_nowait((window, next_page))
+                    await pages.put(js_obj)
+                    self.counters["pages"] += 1
+                finally:
+                    jobs.task_done()
+
+        with harvest_module.get_session(self.max_workers) as session, \
+                con_fut.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            workers = [asyncio.create_task(worker()) for _ in range(self.max_workers)]
+            try:
+                join = asyncio.create_task(jobs.join())
+                done, _ = await asyncio.wait([join, *workers], return_when=asyncio.FIRST_COMPLETED)
+                if join not in done:
+                    join.cancel()
+                    for task in done:
+                        task.result()
+            finally:
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+        await pages.put(None)
+
+    async def parse(self, pages, rows):
+        """Этап разбора: переводит страницы ответа в строки с колонками columns и, если задан file_name,
+        записывает их в файл
+
+        Args:
+            pages (Queue): Очередь страниц
+            rows (Queue): Очередь пачек строк
+        """
+        writer = harvest_module.VacanciesWriter(self.file_name) if self.file_name else None
+        try:
+            while (js_obj := await pages.get()) is not None:
+                page_rows = harvest_module.get_rows(js_obj)
+                if writer is not None:
+                    writer.write(page_rows)
+                self.counters["rows"] += len(page_rows)
+                await rows.put(page_rows)
+        finally:
+            if writer is not None:
+                writer.close()
+        await rows.put(None)
+
+    def get_vacancy(self, row):
+        """Переводит строку в вакансию
+
+        Args:
+            row (list): Строка с колонками columns
+        Returns:
+            Vacancy: Вакансия или None, если в строке есть пустые поля или валюта неизвестна
+        """
+        if any(value is None or value == "" for value in row) or row[3] not in vacancies_module.currency_to_rub:
+            return None
+        return vacancies_module.Vacancy(dict(zip(vacancies_module.name_list, row)))
+
+    async def convert(self, rows, vacancies):
+        """Этап перевода: получает из строк вакансии, строки с пустыми полями и неизвестными валютами
+        пропускаются, как в DataSet. В рубли зарплаты переводятся при получении динамик
+
+        Args:
+            rows (Queue): Очередь пачек строк
+            vacancies (Queue): Очередь пачек вакансий
+        """
+        while (page_rows := await rows.get()) is not None:
+            page_vacancies = [vacancy for vacancy in map(self.get_vacancy, page_rows) if vacancy is not None]
+            self.counters["skipped"] += len(page_rows) - len(page_vacancies)
+            await vacancies.put(page_vacancies)
+        await vacancies.put(None)
+
+    async def aggregate(self, vacancies):
+        """Этап накопления: добавляет вакансии в статистику. Между await пачка добавляется целиком
+
+        Args:
+            vacancies (Queue): Очередь пачек вакансий
+        """
+        while (page_vacancies := await vacancies.get()) is not None:
+            for vacancy in page_vacancies:
+                self.statistic.add(vacancy)
+            self.counters["vacancies"] += len(page_vacancies)
+
+    async def run(self, date_from="2022-12-25T00:00:00+0300", date_to="2022-12-25T23:59:00+0300", window_hours=12):
+        """Загружает вакансии за промежуток и накапливает их в статистике. Ошибка любого этапа
+        останавливает остальные этапы
+
+        Args:
+            date_from (str): Начало промежутка
+            date_to (str): Конец промежутка
+            window_hours (float): Длина одного окна запросов в часах
+        """
+        self.loop = asyncio.get_running_loop()
+        pages, rows, vacancies = [asyncio.Queue(self.queue_size) for _ in range(3)]
+        stages = [asyncio.create_task(stage) for stage in
+                  (self.fetch(harvest_module.get_windows(date_from, date_to, window_hours), pages),
+                   self.parse(pages, rows), self.convert(rows, vacancies), self.aggregate(vacancies))]
+        try:
+            await asyncio.gather(*stages)
+        finally:
+            for stage in stages:
+                stage.cancel()
+            self.loop = None
+
+    async def copy_statistic(self):
+        """Копирует статистику в цикле asyncio, между пачками этапа накопления
+
+        Returns:
+            Statistic: Копия накопленной статистики
+        """
+        return copy.deepcopy(self.statistic)
+
+    def get_snapshot(self):
+        """Получает статистику, которая не изменится во время подсчета динамик. Внутри цикла загрузки
+        и когда загрузка не идет это сама статистика; из другого потока копия снимается в цикле, поэтому
+        поток не блокирует загрузку, а ждет только копирования
+
+        Returns:
+            Statistic: Накопленная статистика или ее копия
+        """
+        loop = self.loop
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if loop is None or loop is running_loop or not loop.is_running():
+            return self.statistic
+        try:
+            return asyncio.run_coroutine_threadsafe(self.copy_statistic(), loop).result()
+        except RuntimeError:
+            return self.statistic
+
+    def get_dynamics(self):
+        """Получает динамики по уже накопленным вакансиям, можно вызывать во время загрузки
+
+        Returns:
+            dict, dict, dict, dict, dict, dict: Все необходимые статистики, как в DataSet.get_dynamics
+        """
+        statistic = self.get_snapshot()
+        if self.sketched:
+            statistic = statistic.get_statistic()
+        return vacancies_module.DataSet.build_dynamics(statistic, self.rates)
+
+    def get_quantile_dynamics(self, fractions=(0.5,)):
+        """Получает квантили зарплат по уже накопленным вакансиям, нужен режим sketched
+
+        Args:
+            fractions (tuple): Доли от 0 до 1, например 0.5 для медианы
+        Returns:
+            dict, dict, dict: Квантили, как в DataSet.get_quantile_dynamics
+        """
+        if not self.sketched:
+            raise ValueError("Квантили зарплат считаются только скетчами, нужен sketched=True")
+        return vacancies_module.DataSet.build_quantile_dynamics(self.get_snapshot(), fractions)
+
+
+async def print_progress(pipeline, interval=5.0):
+    """Печатает счетчики и текущие динамики, пока идет загрузка
+
+    Args:
+        pipeline (IngestionPipeline): Загрузка
+        interval (float): Интервал печати в секундах
+    """
+    while True:
+        await asyncio.sleep(interval)
+        print(pipeline.counters)
+        vacancies_module.DataSet.print_statistic(*pipeline.get_dynamics())
+
+
+async def main(vacancy_name, date_from, date_to, file_name=None, window_hours=12, max_workers=4, rate=2.0,
+               rates=None):
+    """Загружает вакансии, печатая динамики по ходу загрузки и в конце
+
+    Args:
+        vacancy_name (str): Название выбранной профессии
+        date_from (str): Начало промежутка
+        date_to (str): Конец промежутка
+        file_name (str): Путь к файлу для сохранения строк
+        window_hours (float): Длина одного окна запросов в часах
+        max_workers (int): Количество одновременных запросов
+        rate (float): Максимальное количество запросов в секунду
+        rates (CurrencyRates): Таблица курсов валют по месяцам, None - курсы currency_to_rub
+    """
+    pipeline = IngestionPipeline(vacancy_name, rates, max_workers=max_workers, rate=rate, file_name=file_name)
+    progress = asyncio.create_task(print_progress(pipeline))
+    try:
+        await pipeline.run(date_from, date_to, window_hours)
+    finally:
+        progress.cancel()
+    print(pipeline.counters)
+    vacancies_module.DataSet.print_statistic(*pipeline.get_dynamics())
+
+
+if __name__ == "__main__":
+    asyncio.run(main(input("Введите название профессии: "), "2022-12-25T00:00:00+0300", "2022-12-25T23:59:00+0300"))
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import shutil
+
+
+class RenderCache:
+    """Класс кэша готовых файлов отчета (graph.png, report.xlsx, report.pdf) с адресацией по содержимому.
+
+    Файл хранится под хэшем всех входных данных, от которых он зависит, поэтому при неизменных динамиках
+    отчет копируется с диска, а не строится заново. Общий размер кэша ограничен: при превышении удаляются
+    файлы, которые дольше всего не использовались.
+
+    Attributes:
+        cache_dir (str): Папка кэша
+        max_size (int): Наибольший общий размер файлов кэша в байтах
+    """
+
+    def __init__(self, cache_dir="render_cache", max_size=256 * 1024 * 1024):
+        """Инициализирует объект RenderCache и создает папку кэша.
+
+        Args:
+            cache_dir (str): Папка кэша
+            max_size (int): Наибольший общий размер файлов кэша в байтах
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def get_key(*parts):
+        """Вычисляет ключ кэша по входным данным. Словари учитываются вместе с порядком ключей,
+        так как от него зависит порядок столбцов на графиках и строк в таблицах
+
+        Args:
+            parts: Входные данные: строки, числа, словари и списки
+        Returns:
+            str: Хэш sha256 входных данных
+        """
+        def normalize(value):
+            if isinstance(value, dict):
+                return [[normalize(k), normalize(v)] for k, v in value.items()]
+            if isinstance(value, (list, tuple)):
+                return [normalize(v) for v in value]
+            return value
+
+        data = json.dumps(normalize(parts), ensure_ascii=False)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def get_path(self, key, suffix):
+        """Возвращает путь к файлу кэша
+
+        Args:
+            key (str): Ключ кэша
+            suffix (str): Расширение файла
+        Returns:
+            str: Путь к файлу кэша
+        """
+        return os.path.join(self.cache_dir, key + suffix)
+
+    def get(self, key, file_name):
+        """Копирует файл из кэша, если он там есть, и отмечает его как недавно использованный
+
+        Args:
+            key (str): Ключ кэша
+            file_name (str): Куда скопировать файл
+        Returns:
+            bool: Найден ли файл в кэше
+        """
+        path = self.get_path(key, os.path.splitext(file_name)[1])
+        try:
+            shutil.copyfile(path, file_name)
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def put(self, key, file_name):
+        """Сохраняет готовый файл в кэш и удаляет старые файлы, если кэш превысил допустимый размер
+
+        Args:
+            key (str): Ключ кэша
+            file_name (str): Готовый файл
+        """
+        path = self.get_path(key, os.path.splitext(file_name)[1])
+        temp_path = "{0}.{1}.tmp".format(path, os.getpid())
+        shutil.copyfile(file_name, temp_path)
+        os.replace(temp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Удаляет давно не использованные файлы, пока общий размер кэша больше max_size
+        """
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".tmp"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
@@ -0,0 +1,247 @@
+import heapq
+import math
+import random
+
+
+class SpaceSaving:
+    """Класс для подсчета самых частых значений потока (например городов) в фиксированной памяти.
+
+    Вариант алгоритма Space-Saving с пакетным вытеснением: счетчики заводятся для каждого нового значения,
+    а когда их становится больше 2 * capacity, остаются capacity самых больших. floor - наибольший вытесненный
+    счетчик, то есть оценка сверху количества любого неотслеживаемого значения; новое значение начинает
+    со счетчика floor и ошибки floor. Для отслеживаемого значения count - error <= настоящее количество <= count,
+    а любое значение с долей больше 1 / capacity всегда отслеживается. Порядок счетчиков - порядок первого
+    появления, как в словарях Statistic. К счетчику можно привязать данные (payload), например суммы зарплат
+    города: они накапливаются с момента, когда значение начало отслеживаться.
+
+    Attributes:
+        capacity (int): Количество гарантированно отслеживаемых значений
+        new_payload (function): Создает данные нового счетчика, None - без данных
+        counters (dict): Для каждого значения [счетчик, ошибка, данные]
+        floor (int): Наибольший вытесненный счетчик
+        total (int): Количество всех учтенных значений
+    """
+
+    def __init__(self, capacity=200, new_payload=None):
+        """Инициализирует пустой объект SpaceSaving.
+
+        Args:
+            capacity (int): Количество гарантированно отслеживаемых значений
+            new_payload (function): Создает данные нового счетчика, должна передаваться в другой процесс
+        """
+        self.capacity = capacity
+        self.new_payload = new_payload
+        self.counters = {}
+        self.floor = 0
+        self.total = 0
+
+    def add(self, item, number=1):
+        """Учитывает значение
+
+        Args:
+            item (hashable): Значение
+            number (int): Сколько раз значение встретилось
+        Returns:
+            object: Данные счетчика значения
+        """
+        self.total += number
+        counter = self.counters.get(item)
+        if counter is None:
+            counter = self.counters[item] = [self.floor, self.floor,
+                                             None if self.new_payload is None else self.new_payload()]
+        counter[0] += number
+        if len(self.counters) > 2 * self.capacity:
+            self.prune()
+        return counter[2]
+
+    def prune(self):
+        """Оставляет capacity самых больших счетчиков в порядке первого появления
+        """
+        if len(self.counters) <= self.capacity:
+            return
+        kept = heapq.nlargest(self.capacity + 1, self.counters.items(), key=lambda item: item[1][0])
+        self.floor = max(self.floor, kept.pop()[1][0])
+        kept = set([item for item, _ in kept])
+        self.counters = dict([(item, counter) for item, counter in self.counters.items() if item in kept])
+
+    def merge(self, other, merge_payload=None):
+        """Добавляет счетчики, посчитанные по другой части потока. Для значения, которого нет в одном
+        из объектов, берется floor этого объекта. Данные счетчиков, которых не было, переходят из other
+        без копирования, поэтому other после объединения не используется
+
+        Args:
+            other (SpaceSaving): Счетчики по другой части потока
+            merge_payload (function): Добавляет данные счетчика other к данным счетчика, None - без данных
+        """
+        for item, (count, error, payload) in other.counters.items():
+            counter = self.counters.get(item)
+            if counter is None:
+                self.counters[item] = [count + self.floor, error + self.floor, payload]
+            else:
+                counter[0] += count
+                counter[1] += error
+                if merge_payload is not None:
+                    merge_payload(counter[2], payload)
+        for item, counter in self.counters.items():
+            if item not in other.counters:
+                counter[0] += other.floor
+                counter[1] += other.floor
+        self.floor += other.floor
+        self.total += other.total
+        self.prune()
+
+    def top(self, number=None):
+        """Получает самые частые значения
+
+        Args:
+            number (int): Количество значений, по умолчанию все отслеживаемые
+        Returns:
+            list: Тройки (значение, счетчик, ошибка) по убыванию счетчика
+        """
+        counters = sorted(self.counters.items(), key=lambda item: item[1][0], reverse=True)
+        return [(item, count, error) for item, (count, error, _) in counters[:number]]
+
+    def items(self):
+        """Получает отслеживаемые значения с их данными в порядке первого появления
+
+        Returns:
+            list: Тройки (значение, количество с момента отслеживания, данные)
+        """
+        return [(item, count - error, payload) for item, (count, error, payload) in self.counters.items()]
+
+
+class QuantileSketch:
+    """Класс для приближенного подсчета квантилей (медианы, перцентилей) потока чисел в фиксированной памяти.
+
+    Скетч KLL: числа хранятся в уровнях-компакторах, число на уровне h представляет 2 ** h чисел потока.
+    Когда уровень заполняется, он сортируется и на следующий уровень переходит каждое второе число,
+    начиная с первого или второго случайно. Вместимость уровней убывает от верхнего к нижним в c раз,
+    поэтому всего хранится около k / (1 - c) чисел, а ошибка ранга - порядка 1 / k. Генератор случайных
+    чисел создается с постоянным зерном, поэтому при том же порядке чисел результат повторяется.
+    Скетчи, посчитанные по частям потока, объединяются методом merge.
+
+    Attributes:
+        k (int): Вместимость верхнего уровня, определяет точность
+        c (float): Во сколько раз уровень меньше следующего
+        compactors (list): Уровни со списками чисел
+        size (int): Количество хранимых чисел
+        max_size (int): Сколько чисел можно хранить при текущем количестве уровней
+        count (int): Количество учтенных чисел
+    """
+
+    def __init__(self, k=200, c=2 / 3):
+        """Инициализирует пустой объект QuantileSketch.
+
+        Args:
+            k (int): Вместимость верхнего уровня
+            c (float): Во сколько раз уровень меньше следующего
+        """
+        self.k = k
+        self.c = c
+        self.compactors = []
+        self.size = 0
+        self.max_size = 0
+        self.count = 0
+        self.random = random.Random(0)
+        self.grow()
+
+    def get_capacity(self, level):
+        """Получает вместимость уровня
+
+        Args:
+            level (int): Номер уровня
+        Returns:
+            int: Вместимость
+        """
+        return int(math.ceil(self.k * self.c ** (len(self.compactors) - level - 1))) + 1
+
+    def grow(self):
+        """Добавляет уровень сверху
+        """
+        self.compactors.append([])
+        self.max_size = sum([self.get_capacity(level) for level in range(len(self.compactors))])
+
+    def add(self, value):
+        """Учитывает число
+
+        Args:
+            value (float): Число
+        """
+        self.compactors[0].append(value)
+        self.size += 1
+        self.count += 1
+        if self.size >= self.max_size:
+            self.compress()
+
+    def extend(self, values):
+        """Учитывает несколько чисел
+
+        Args:
+            values (iterable): Числа
+        """
+        for value in values:
+            self.add(value)
+
+    def compress(self):
+        """Сжимает первый переполненный уровень и, если чисел все еще слишком много, следующие
+        """
+        for level in range(len(self.compactors)):
+            compactor = self.compactors[level]
+            if len(compactor) >= self.get_capacity(level):
+                if level + 1 == len(self.compactors):
+                    self.grow()
+                compactor.sort()
+                rest = [compactor.pop()] if len(compactor) % 2 else []
+                self.compactors[level + 1].extend(compactor[self.random.randint(0, 1)::2])
+                self.compactors[level] = rest
+                self.size = sum(map(len, self.compactors))
+                if self.size < self.max_size:
+                    break
+
+    def merge(self, other):
+        """Добавляет скетч, посчитанный по другой части потока
+
+        Args:
+            other (QuantileSketch): Скетч по другой части потока
+        """
+        while len(self.compactors) < len(other.compactors):
+            self.grow()
+        for level, compactor in enumerate(other.compactors):
+            self.compactors[level].extend(compactor)
+        self.count += other.count
+        self.size = sum(map(len, self.compactors))
+        while self.size >= self.max_size:
+            self.compress()
+
+    def quantiles(self, fractions):
+        """Получает несколько квантилей
+
+        Args:
+            fractions (list): Доли от 0 до 1, например 0.5 для медианы
+        Returns:
+            list: Квантили в порядке fractions, None для пустого скетча
+        """
+        if not self.count:
+            return [None for _ in fractions]
+        items = sorted([(value, 1 << level) for level, compactor in enumerate(self.compactors)
+                        for value in compactor])
+        total = sum([weight for _, weight in items])
+        result = []
+        for fraction in fractions:
+            rank, weight = max(1, math.ceil(fraction * total)), 0
+            for value, item_weight in items:
+                weight += item_weight
+                if weight >= rank:
+                    break
+            result.append(value)
+        return result
+
+    def quantile(self, fraction):
+        """Получает квантиль
+
+        Args:
+            fraction (float): Доля от 0 до 1, например 0.5 для медианы
+        Returns:
+            float: Квантиль или None для пустого скетча
+        """
+        return self.quantiles([fraction])[0]
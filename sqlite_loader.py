@@ -0,0 +1,109 @@
+import contextlib
+import csv
+import itertools
+import sqlite3
+
+
+@contextlib.contextmanager
+def bulk_pragmas(connection, cache_size=256 * 1024):
+    """Настраивает соединение sqlite3 на время массовой загрузки: журнал WAL, запись без ожидания сброса
+    на диск, большой кэш страниц и временные таблицы в памяти. Базы, которые так загружаются, собираются
+    из csv-файлов и при сбое пересобираются, поэтому synchronous = OFF допустим. После загрузки прежние
+    journal_mode, synchronous и cache_size восстанавливаются, поэтому файлы -wal и -shm не остаются
+
+    Args:
+        connection (Connection): Соединение с базой, вне транзакции
+        cache_size (int): Размер кэша страниц в КиБ
+    """
+    synchronous = connection.execute("PRAGMA synchronous").fetchone()[0]
+    previous_cache_size = connection.execute("PRAGMA cache_size").fetchone()[0]
+    journal_mode = connection.execute("PRAGMA journal_mode").fetchone()[0]
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("PRAGMA synchronous = OFF")
+    connection.execute(f"PRAGMA cache_size = {-cache_size}")
+    connection.execute("PRAGMA temp_store = MEMORY")
+    try:
+        yield connection
+    finally:
+        connection.execute(f"PRAGMA journal_mode = {journal_mode}")
+        connection.execute(f"PRAGMA synchronous = {synchronous}")
+        connection.execute(f"PRAGMA cache_size = {previous_cache_size}")
+
+
+def quote(name):
+    """Заключает имя таблицы или колонки в кавычки для запроса
+
+    Args:
+        name (str): Имя
+    Returns:
+        str: Имя в кавычках
+    """
+    return '"{0}"'.format(name.replace('"', '""'))
+
+
+def create_currency_table(connection, table, currencies):
+    """Создает таблицу курсов с первичным ключом по месяцу и колонкой REAL для каждой валюты. Таблица,
+    созданная раньше через DataFrame.to_sql, без ключа, переносится в новую схему, недостающие колонки валют
+    добавляются
+
+    Args:
+        connection (Connection): Соединение с базой
+        table (str): Название таблицы
+        currencies (list): Коды валют
+    """
+    columns = dict([(name, pk) for _, name, _, _, _, pk in connection.execute(f"PRAGMA table_info({quote(table)})")])
+    migrate = bool(columns) and not columns.get("date")
+    if migrate:
+        connection.execute(f"ALTER TABLE {quote(table)} RENAME TO {quote(table + '_old')}")
+        currencies = currencies + [name for name in columns if name not in currencies and name != "date"]
+    elif columns:
+        for currency in currencies:
+            if currency not in columns:
+                connection.execute(f"ALTER TABLE {quote(table)} ADD COLUMN {quote(currency)} REAL")
+
+    definition = ", ".join(["{0} REAL".format(quote(currency)) for currency in currencies])
+    connection.execute(f'CREATE TABLE IF NOT EXISTS {quote(table)} ("date" TEXT NOT NULL PRIMARY KEY, {definition}) '
+                       f'WITHOUT ROWID')
+    if migrate:
+        names = ", ".join(map(quote, columns))
+        connection.execute(f"INSERT OR REPLACE INTO {quote(table)} ({names}) SELECT {names} "
+                           f'FROM {quote(table + "_old")} WHERE "date" IS NOT NULL')
+        connection.execute(f"DROP TABLE {quote(table + '_old')}")
+
+
+def load_currency_csv(csv_path="currency.csv", db_path="currency.sqlite", table="currency", chunk_size=1000):
+    """Загружает курсы валют из csv-файла с колонкой date и колонками валют в базу sqlite3.
+
+    Строки читаются потоком и вставляются пачками через executemany. Курсы записываются числами REAL,
+    пустые значения - NULL. Месяцы, которые уже есть в таблице, обновляются, поэтому повторная загрузка
+    того же или дополненного файла не создает дубликатов
+
+    Args:
+        csv_path (str): Путь к csv-файлу с курсами
+        db_path (str): Путь к базе
+        table (str): Название таблицы
+        chunk_size (int): Количество строк в одной пачке
+    Returns:
+        int: Количество загруженных строк
+    """
+    connection = sqlite3.connect(db_path)
+    number = 0
+    try:
+        with open(csv_path, mode="r", encoding="utf-8-sig", newline="") as file, bulk_pragmas(connection):
+            reader = csv.reader(file)
+            header = next(reader)
+            currencies = header[1:]
+            names = ", ".join(map(quote, ["date"] + currencies))
+            updates = ", ".join(["{0} = excluded.{0}".format(quote(currency)) for currency in currencies])
+            statement = f"INSERT INTO {quote(table)} ({names}) VALUES ({', '.join('?' * len(header))}) " \
+                        f'ON CONFLICT ("date") DO UPDATE SET {updates}'
+            with connection:
+                create_currency_table(connection, table, currencies)
+                for chunk in iter(lambda: list(itertools.islice(reader, chunk_size)), []):
+                    rows = [[row[0]] + [float(value) if value else None for value in row[1:]]
+                            for row in chunk if len(row) == len(header) and row[0]]
+                    connection.executemany(statement, rows)
+                    number += len(rows)
+    finally:
+        connection.close()
+    return number
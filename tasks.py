@@ -0,0 +1,59 @@
+import importlib.abc
+import importlib.util
+import os
+import sys
+
+tasks_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+class TaskFinder(importlib.abc.MetaPathFinder):
+    """Класс для импорта скриптов заданий, названия которых (например 3.2.3.py) не являются именами модулей.
+
+    Скрипт 3.2.3.py импортируется как модуль task_3_2_3. Так как поиск идет по имени модуля, объекты из
+    скриптов можно передавать в процессы пула и при запуске процессов через spawn: дочерний процесс
+    найдет модуль тем же путем.
+    """
+    prefix = "task_"
+
+    def find_spec(self, fullname, path=None, target=None):
+        """Находит скрипт задания по имени модуля
+
+        Args:
+            fullname (str): Имя модуля, например task_3_2_3
+            path (list): Не используется
+            target (module): Не используется
+        Returns:
+            ModuleSpec: Спецификация модуля или None, если это не скрипт задания
+        """
+        if not fullname.startswith(self.prefix):
+            return None
+        file_name = os.path.join(tasks_dir, fullname[len(self.prefix):].replace("_", ".") + ".py")
+        if not os.path.exists(file_name):
+            return None
+        return importlib.util.spec_from_file_location(fullname, file_name)
+
+
+def get_module_name(task):
+    """Возвращает имя модуля для скрипта задания
+
+    Args:
+        task (str): Номер задания, например 3.2.3
+    Returns:
+        str: Имя модуля, например task_3_2_3
+    """
+    return TaskFinder.prefix + task.replace(".", "_")
+
+
+def load(task):
+    """Импортирует скрипт задания
+
+    Args:
+        task (str): Номер задания, например 3.2.3
+    Returns:
+        module: Модуль скрипта
+    """
+    return importlib.import_module(get_module_name(task))
+
+
+if not any(isinstance(finder, TaskFinder) for finder in sys.meta_path):
+    sys.meta_path.append(TaskFinder())
@@ -0,0 +1,81 @@
+import csv
+import os
+import random
+import tempfile
+import unittest
+import tasks
+
+vacancies_module = tasks.load("2.1.3")
+
+
+def write_vacancies(file_name, rows=3000, seed=1, currencies=("RUR", "RUR", "RUR", "USD", "EUR", "KZT")):
+    """Записывает файл вакансий, в котором годы выбранной профессии впервые встречаются в другом порядке,
+    чем годы всех вакансий
+
+    Args:
+        file_name (str): Путь к файлу
+        rows (int): Количество вакансий
+        seed (int): Начальное значение генератора случайных чисел
+        currencies (tuple): Валюты, из которых выбирается валюта вакансии
+    """
+    rnd = random.Random(seed)
+    with open(file_name, mode="w", encoding="utf-8-sig", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(vacancies_module.name_list)
+        for i in range(rows):
+            name = rnd.choice(["Программист Python", "Аналитик", "Инженер-программист", "Менеджер"])
+            year = rnd.randrange(2003, 2023)
+            salary_from = rnd.randrange(10, 300) * 1000
+            writer.writerow([name, salary_from, salary_from + rnd.randrange(0, 50) * 1000, rnd.choice(currencies),
+                             rnd.choice(["Москва", "Казань", "Пермь", "Омск"]),
+                             "{0}-{1:02d}-01T10:00:00+0300".format(year, rnd.randrange(1, 13))])
+
+
+class DataSetTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.directory.name, "vacancies.csv")
+        write_vacancies(self.file_name)
+        self.dataset = vacancies_module.DataSet(self.file_name, "Программист")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assert_same_dynamics(self, expected, actual):
+        for expected_dynamics, actual_dynamics in zip(expected, actual):
+            self.assertEqual(list(expected_dynamics.items()), list(actual_dynamics.items()))
+
+    def test_columns_keep_row_order(self):
+        try:
+            import pyarrow
+        except ImportError:
+            self.skipTest("pyarrow не установлен")
+        expected = self.dataset.get_dynamics()
+        for block_size in (1 << 12, 1 << 16, 1 << 24):
+            statistic = self.dataset.get_statistic_by_columns(block_size=block_size)
+            self.assert_same_dynamics(expected, self.dataset.build_dynamics(statistic))
+
+    def test_mmap_keeps_row_order(self):
+        self.assert_same_dynamics(self.dataset.get_dynamics(), self.dataset.get_dynamics(by_mmap=True))
+
+    def test_warehouse_keeps_row_order(self):
+        self.assert_same_dynamics(self.dataset.get_dynamics(), self.dataset.get_dynamics(from_warehouse=True))
+
+    def test_unknown_currency(self):
+        write_vacancies(self.file_name, currencies=("RUR", "XYZ"))
+        with self.assertRaises(KeyError):
+            self.dataset.get_dynamics()
+        with self.assertRaises(KeyError):
+            self.dataset.get_dynamics(by_mmap=True)
+        with self.assertRaises(KeyError):
+            self.dataset.get_dynamics(from_warehouse=True)
+        try:
+            import pyarrow
+        except ImportError:
+            return
+        with self.assertRaises(KeyError):
+            self.dataset.get_dynamics(by_columns=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
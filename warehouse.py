@@ -0,0 +1,531 @@
+import codecs
+import csv
+import functools
+import io
+import json
+import math
+import os
+import re
+import sqlite3
+import sqlite_loader
+
+columns = ["name", "salary_from", "salary_to", "salary_currency", "area_name", "published_at"]
+schema = """
+CREATE TABLE IF NOT EXISTS source (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL UNIQUE,
+    header TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    rows INTEGER NOT NULL,
+    tail TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS title (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS area (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS currency (
+    id INTEGER PRIMARY KEY,
+    code TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS vacancy (
+    id INTEGER PRIMARY KEY,
+    title_id INTEGER REFERENCES title (id),
+    salary INTEGER,
+    salary_mean REAL,
+    currency_id INTEGER REFERENCES currency (id),
+    area_id INTEGER REFERENCES area (id),
+    year INTEGER,
+    month INTEGER
+);
+CREATE TABLE IF NOT EXISTS summary_year (
+    year INTEGER,
+    month INTEGER,
+    currency_id INTEGER,
+    salary INTEGER,
+    salary_count INTEGER,
+    salary_mean REAL,
+    salary_mean_count INTEGER,
+    number INTEGER,
+    first_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS summary_area (
+    area_id INTEGER,
+    currency_id INTEGER,
+    salary INTEGER,
+    salary_count INTEGER,
+    salary_mean REAL,
+    salary_mean_count INTEGER,
+    number INTEGER,
+    first_id INTEGER
+);
+"""
+indexes = ["CREATE INDEX IF NOT EXISTS vacancy_area ON vacancy (area_id, year, month, currency_id, salary, salary_mean)",
+           "CREATE INDEX IF NOT EXISTS vacancy_title ON vacancy "
+           "(title_id, year, month, currency_id, area_id, salary, salary_mean)"]
+group_columns = {"year": "vacancy.year", "area": "vacancy.area_id"}
+metacharacters = re.compile(r"[.^$*+?{}\[\]\\|()]")
+summary_columns = {"year": "year, month, currency_id", "area": "area_id, currency_id"}
+vacancy_aggregates = {"salary": "SUM(vacancy.salary)", "salary_count": "COUNT(vacancy.salary)",
+                      "salary_mean": "SUM(vacancy.salary_mean)", "salary_mean_count": "COUNT(vacancy.salary_mean)",
+                      "number": "COUNT(*)", "first_id": "MIN(CASE WHEN vacancy.salary IS NOT NULL THEN vacancy.id END)"}
+summary_aggregates = {"salary": "SUM(vacancy.salary)", "salary_count": "SUM(vacancy.salary_count)",
+                      "salary_mean": "SUM(vacancy.salary_mean)", "salary_mean_count": "SUM(vacancy.salary_mean_count)",
+                      "number": "SUM(vacancy.number)", "first_id": "MIN(vacancy.first_id)"}
+
+
+def is_regex(vacancy_name):
+    """Проверяет, что в названии профессии есть метасимволы регулярных выражений. Пробелы и дефисы
+    в названиях вроде "Инженер-программист" метасимволами не считаются, такие названия ищутся как подстроки
+
+    Args:
+        vacancy_name (str): Название профессии
+    Returns:
+        bool: Название нужно проверять как регулярное выражение
+    """
+    return metacharacters.search(vacancy_name) is not None
+
+
+class VacancyWarehouse:
+    """Класс хранилища вакансий в базе sqlite3, из которого динамики получаются запросами GROUP BY
+    без чтения csv-файла.
+
+    Названия вакансий, города и валюты хранятся в отдельных таблицах-словарях, в таблице вакансий лежат
+    только их номера, год и месяц публикации целыми числами и две зарплаты: salary - как в Vacancy из 2.1.3.py
+    (среднее, округленное вниз, только для строк без пустых полей, которые учитывает DataSet), и salary_mean -
+    как в 3.2.3.py (среднее заполненных полей salary_from и salary_to). Индексы по городу и названию
+    содержат все колонки запросов, поэтому запросы читают только индекс. Профессия ищется не по строкам,
+    а по уникальным названиям, найденные названия выбираются из индекса по названию. Запросы по всем
+    вакансиям читают сводные таблицы сумм по году и по городу, которые считаются при загрузке.
+
+    Attributes:
+        path (str): Путь к базе
+        connection (Connection): Соединение с базой
+    """
+
+    schema_version = 2
+
+    def __init__(self, path):
+        """Открывает или создает базу. База со старой версией схемы создается заново.
+
+        Args:
+            path (str): Путь к базе
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] != self.schema_version:
+            tables = self.connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+            for table, in tables:
+                self.connection.execute(f'DROP TABLE "{table}"')
+            self.connection.execute(f"PRAGMA user_version = {self.schema_version}")
+        self.connection.executescript(schema)
+        self.connection.create_function("regexp", 2, lambda pattern, text: re.search(pattern, text) is not None,
+                                        deterministic=True)
+
+    @staticmethod
+    def get_version(filename):
+        """Получает размер и время изменения входного файла, по которым проверяется актуальность базы
+
+        Args:
+            filename (str): Путь к csv-файлу
+        Returns:
+            tuple: Размер и время изменения файла
+        """
+        stat = os.stat(filename)
+        return stat.st_size, stat.st_mtime_ns
+
+    @classmethod
+    def open(cls, filename):
+        """Открывает базу входного файла и дозагружает в нее строки, которых там еще нет
+
+        Args:
+            filename (str): Путь к csv-файлу
+        Returns:
+            VacancyWarehouse: Хранилище вакансий файла
+        """
+        warehouse = cls(filename + ".db")
+        warehouse.load_csv(filename)
+        return warehouse
+
+    def close(self):
+        """Закрывает соединение с базой
+        """
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def clear(self):
+        """Удаляет все вакансии и словари
+        """
+        with self.connection:
+            for table in ("vacancy", "summary_year", "summary_area", "title", "area", "currency", "source"):
+                self.connection.execute(f"DELETE FROM {table}")
+
+    def get_dictionary(self, table, column):
+        """Считывает таблицу-словарь
+
+        Args:
+            table (str): Название таблицы
+            column (str): Колонка значений
+        Returns:
+            dict: Номер для каждого значения в порядке номеров
+        """
+        return dict(self.connection.execute(f"SELECT {column}, id FROM {table} ORDER BY id"))
+
+    @staticmethod
+    def encode(dictionary, value, new_values):
+        """Получает номер значения в словаре, новые значения запоминаются для вставки в таблицу
+
+        Args:
+            dictionary (dict): Номер для каждого значения
+            value (str): Значение, пустая строка - нет значения
+            new_values (list): Новые пары (номер, значение)
+        Returns:
+            int: Номер значения или None
+        """
+        if not value:
+            return None
+        number = dictionary.get(value)
+        if number is None:
+            number = dictionary[value] = len(dictionary) + 1
+            new_values.append((number, value))
+        return number
+
+    @staticmethod
+    def get_salaries(row, complete):
+        """Получает обе зарплаты строки
+
+        Args:
+            row (list): Поля строки в порядке columns
+            complete (bool): В строке нет пустых полей
+        Returns:
+            int, float: Зарплата как в Vacancy (None для неполной строки) и среднее заполненных полей зарплаты
+        """
+        values = [float(value) for value in row[1:3] if value]
+        salary_mean = sum(values) / len(values) if values else None
+        return math.floor((values[0] + values[1]) / 2) if complete else None, salary_mean
+
+    @staticmethod
+    def get_date(published_at):
+        """Получает год и месяц публикации
+
+        Args:
+            published_at (str): Дата публикации, например 2022-12-25T00:00:00+0300
+        Returns:
+            int, int: Год и месяц или None, если их нет в дате
+        """
+        year, month = published_at[:4], published_at[5:7]
+        return int(year) if year.isdigit() else None, int(month) if month.isdigit() else None
+
+    @staticmethod
+    def get_block_end(data):
+        """Находит конец последней полной строки в байтах, не считая переводы строк внутри полей в кавычках
+
+        Args:
+            data (bytes): Байты csv-файла, начинающиеся с начала строки
+        Returns:
+            int: Смещение сразу после последней полной строки или 0, если полной строки нет
+        """
+        end = data.rfind(b"\n") + 1
+        while end and data.count(b'"', 0, end) % 2:
+            end = data.rfind(b"\n", 0, end - 1) + 1
+        return end
+
+    @staticmethod
+    def get_tail(file, offset, length=64):
+        """Получает байты перед отметкой, по которым проверяется, что уже загруженная часть файла не изменилась
+
+        Args:
+            file (file): Входной файл, открытый в двоичном режиме
+            offset (int): Отметка в байтах
+            length (int): Количество байтов
+        Returns:
+            str: Байты перед отметкой в шестнадцатеричном виде
+        """
+        file.seek(max(0, offset - length))
+        return file.read(min(offset, length)).hex()
+
+    def get_columns(self, block, header, dictionaries, new_values):
+        """Разбирает блок строк csv-файла в колонки таблицы вакансий модулем csv. Строки с неверным
+        количеством полей пропускаются
+
+        Args:
+            block (bytes): Полные строки csv-файла без заголовка
+            header (list): Заголовок файла
+            dictionaries (list): Словари названий, городов и валют
+            new_values (dict): Новые пары (номер, значение) для каждой таблицы-словаря
+        Returns:
+            list: Колонки title_id, salary, salary_mean, currency_id, area_id, year, month
+        """
+        positions = [header.index(column) for column in columns]
+        rows = []
+        for row in csv.reader(io.StringIO(block.decode("utf-8"), newline="")):
+            if len(row) != len(header):
+                continue
+            complete = "" not in row
+            row = [row[position] for position in positions]
+            rows.append((self.encode(dictionaries[0], row[0], new_values["title"]),
+                         *self.get_salaries(row, complete),
+                         self.encode(dictionaries[2], row[3], new_values["currency"]),
+                         self.encode(dictionaries[1], row[4], new_values["area"]),
+                         *self.get_date(row[5])))
+        return [list(column) for column in zip(*rows)] or [[] for _ in range(7)]
+
+    def get_columns_by_arrow(self, block, header, dictionaries, new_values):
+        """Разбирает блок строк csv-файла в колонки таблицы вакансий векторными операциями pyarrow,
+        без обработки каждой строки в Python. Результат тот же, что у get_columns
+
+        Args:
+            block (bytes): Полные строки csv-файла без заголовка
+            header (list): Заголовок файла
+            dictionaries (list): Словари названий, городов и валют
+            new_values (dict): Новые пары (номер, значение) для каждой таблицы-словаря
+        Returns:
+            list: Колонки title_id, salary, salary_mean, currency_id, area_id, year, month
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        from pyarrow import csv as pa_csv
+
+        table = pa_csv.read_csv(
+            pa.py_buffer(block),
+            read_options=pa_csv.ReadOptions(column_names=header, use_threads=False),
+            parse_options=pa_csv.ParseOptions(newlines_in_values=True, invalid_row_handler=lambda row: "skip"),
+            convert_options=pa_csv.ConvertOptions(column_types=dict([(column, pa.string()) for column in header]),
+                                                  null_values=[""], strings_can_be_null=True))
+        complete = functools.reduce(pc.and_, [pc.is_valid(column) for column in table.columns])
+
+        def encode(column, dictionary, values):
+            for value in pc.unique(column).drop_null().to_pylist():
+                self.encode(dictionary, value, values)
+            return pc.add(pc.index_in(column, value_set=pa.array(list(dictionary), type=pa.string())), 1)
+
+        def get_number(column, start, stop):
+            text = pc.utf8_slice_codeunits(column, start, stop)
+            return pc.cast(pc.if_else(pc.utf8_is_digit(text), text, pa.scalar(None, pa.string())), pa.int64())
+
+        salary_from, salary_to = pc.cast(table["salary_from"], pa.float64()), pc.cast(table["salary_to"], pa.float64())
+        average = pc.divide(pc.add(salary_from, salary_to), 2)
+        result = [encode(table["name"], dictionaries[0], new_values["title"]),
+                  pc.if_else(complete, pc.cast(pc.floor(average), pa.int64()), pa.scalar(None, pa.int64())),
+                  pc.coalesce(average, salary_from, salary_to),
+                  encode(table["salary_currency"], dictionaries[2], new_values["currency"]),
+                  encode(table["area_name"], dictionaries[1], new_values["area"]),
+                  get_number(table["published_at"], 0, 4),
+                  get_number(table["published_at"], 5, 7)]
+        return [column.to_pylist() for column in result]
+
+    def load_csv(self, filename, block_size=1 << 23):
+        """Загружает в хранилище строки csv-файла, которых там еще нет.
+
+        Файл читается блоками по block_size байт, каждый блок разбирается в колонки (pyarrow, если он
+        установлен, иначе модулем csv) и вставляется одним executemany. Номер вакансии составляется
+        из номера файла и номера строки в файле, а строки вставляются с ON CONFLICT DO UPDATE, поэтому
+        повторная загрузка не создает дубликатов. Для каждого файла запоминается, до какого байта он загружен:
+        в дописанном файле загружаются только новые строки, перезаписанный файл загружается заново.
+        Последняя строка без перевода строки загружается, но отметка остается перед ней, поэтому если
+        строка еще дописывалась, при следующей загрузке она будет обновлена. Индексы при первой загрузке
+        строятся после вставки строк, сводные таблицы пересчитываются в конце
+
+        Args:
+            filename (str): Путь к csv-файлу
+            block_size (int): Размер блока в байтах
+        Returns:
+            int: Количество загруженных вакансий
+        """
+        try:
+            import pyarrow
+            get_columns = self.get_columns_by_arrow
+        except ImportError:
+            get_columns = self.get_columns
+
+        file_key = os.path.abspath(filename)
+        size, mtime = self.get_version(filename)
+        source = self.connection.execute("SELECT id, header, size, mtime, offset, rows, tail FROM source "
+                                         "WHERE file = ?", (file_key,)).fetchone()
+        if source is not None and source[2:4] == (size, mtime):
+            return 0
+
+        number = 0
+        with open(filename, mode="rb") as file, sqlite_loader.bulk_pragmas(self.connection), self.connection:
+            data = file.read(block_size)
+            bom = len(codecs.BOM_UTF8) if data.startswith(codecs.BOM_UTF8) else 0
+            header_end = self.get_block_end(data[:data.find(b"\n") + 1]) or len(data)
+            header = next(csv.reader([data[bom:header_end].decode("utf-8")]), [])
+            if source is None:
+                source_id = self.connection.execute("INSERT INTO source (file, header, size, mtime, offset, rows, "
+                                                    "tail) VALUES (?, ?, 0, 0, 0, 0, '')",
+                                                    (file_key, json.dumps(header))).lastrowid
+                offset, rows = header_end, 0
+            else:
+                source_id, offset, rows = source[0], source[4], source[5]
+                if source[1] != json.dumps(header) or offset > size or self.get_tail(file, offset) != source[6]:
+                    self.connection.execute("DELETE FROM vacancy WHERE id >= ? AND id < ?",
+                                            (source_id << 40, (source_id + 1) << 40))
+                    offset, rows = header_end, 0
+            if not self.connection.execute("SELECT 1 FROM vacancy LIMIT 1").fetchone():
+                for index in indexes:
+                    self.connection.execute("DROP INDEX IF EXISTS " + index.split()[5])
+
+            dictionaries = [self.get_dictionary("title", "name"), self.get_dictionary("area", "name"),
+                            self.get_dictionary("currency", "code")]
+            new_values = {"title": [], "area": [], "currency": []}
+            file.seek(offset)
+            rest = b""
+            while True:
+                chunk = file.read(block_size)
+                data = rest + chunk
+                end = self.get_block_end(data) if chunk else len(data)
+                if end:
+                    block_columns = get_columns(data[:end], header, dictionaries, new_values)
+                    block_rows = len(block_columns[0])
+                    first_id = (source_id << 40) + rows
+                    self.insert(range(first_id, first_id + block_rows), block_columns, new_values)
+                    number += block_rows
+                if not chunk:
+                    break
+                rows += block_rows if end else 0
+                offset += end
+                rest = data[end:]
+
+            for index in indexes:
+                self.connection.execute(index)
+            self.update_summary()
+            self.connection.execute("UPDATE source SET header = ?, size = ?, mtime = ?, offset = ?, rows = ?, tail = ? "
+                                    "WHERE id = ?", (json.dumps(header), size, mtime, offset, rows,
+                                                     self.get_tail(file, offset), source_id))
+        self.connection.execute("ANALYZE")
+        return number
+
+    def insert(self, ids, block_columns, new_values):
+        """Вставляет или обновляет пачку вакансий и вставляет новые значения словарей
+
+        Args:
+            ids (range): Номера вакансий
+            block_columns (list): Колонки вакансий
+            new_values (dict): Новые пары (номер, значение) для каждой таблицы-словаря
+        """
+        for table, values in new_values.items():
+            column = "code" if table == "currency" else "name"
+            self.connection.executemany(f"INSERT INTO {table} (id, {column}) VALUES (?, ?)", values)
+            values.clear()
+        self.connection.executemany(
+            "INSERT INTO vacancy (id, title_id, salary, salary_mean, currency_id, area_id, year, month) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (id) DO UPDATE SET title_id = excluded.title_id, "
+            "salary = excluded.salary, salary_mean = excluded.salary_mean, currency_id = excluded.currency_id, "
+            "area_id = excluded.area_id, year = excluded.year, month = excluded.month", zip(ids, *block_columns))
+
+    def update_summary(self):
+        """Пересчитывает сводные таблицы: суммы и количества зарплат по году, месяцу и валюте
+        и по городу и валюте. Запросы по всем вакансиям читают их вместо таблицы вакансий
+        """
+        for group, keys in summary_columns.items():
+            self.connection.execute(f"DELETE FROM summary_{group}")
+            self.connection.execute(
+                f"INSERT INTO summary_{group} SELECT {keys}, SUM(salary), COUNT(salary), SUM(salary_mean), "
+                f"COUNT(salary_mean), COUNT(*), MIN(CASE WHEN salary IS NOT NULL THEN id END) "
+                f"FROM vacancy GROUP BY {keys}")
+
+    @staticmethod
+    def get_source(group, vacancy_name, regex=False, monthly=False):
+        """Получает таблицу, агрегаты и условие отбора для запроса. Вакансии профессии отбираются
+        по уникальным названиям, для всех вакансий используется сводная таблица, если в ней есть нужные колонки
+
+        Args:
+            group (str): Группировка: year или area
+            vacancy_name (str): Название профессии, None - все вакансии
+            regex (bool): Название профессии - регулярное выражение, как в str.contains
+            monthly (bool): Запросу нужны год и месяц публикации
+        Returns:
+            str, dict, str, tuple: Таблица, выражения агрегатов, условие и его параметры
+        """
+        if vacancy_name is None:
+            if group == "year" or not monthly:
+                return f"summary_{group} AS vacancy", summary_aggregates, "", ()
+            return "vacancy", vacancy_aggregates, "", ()
+        if regex and is_regex(vacancy_name):
+            condition = "vacancy.title_id IN (SELECT id FROM title WHERE name REGEXP ?)"
+        else:
+            condition = "vacancy.title_id IN (SELECT id FROM title WHERE instr(name, ?) > 0)"
+        return "vacancy", vacancy_aggregates, "WHERE " + condition, (vacancy_name,)
+
+    def get_keys(self, group):
+        """Получает значения группы по номерам
+
+        Args:
+            group (str): Группировка: year или area
+        Returns:
+            dict: Значение для каждого номера, для year - None
+        """
+        return None if group == "year" else dict(self.connection.execute("SELECT id, name FROM area"))
+
+    def get_sums(self, group, vacancy_name=None, monthly=False):
+        """Получает суммы и количества зарплат salary по валютам в порядке первого появления групп в файле,
+        как при построчном чтении в DataSet
+
+        Args:
+            group (str): Группировка: year или area
+            vacancy_name (str): Название профессии, None - все вакансии
+            monthly (bool): Группировать еще и по месяцу публикации
+        Returns:
+            list: Строки (значение группы, валюта, месяц в формате ГГГГ-ММ или None, сумма, количество)
+        """
+        table, aggregates, condition, parameters = self.get_source(group, vacancy_name, monthly=monthly)
+        column = group_columns[group]
+        dates = "vacancy.year, vacancy.month" if monthly else "NULL, NULL"
+        rows = self.connection.execute(
+            f"SELECT {column}, vacancy.currency_id, {dates}, {aggregates['salary']}, {aggregates['salary_count']}, "
+            f"{aggregates['first_id']} AS first_id FROM {table} {condition} "
+            f"GROUP BY {column}, {'vacancy.year, vacancy.month, ' if monthly else ''}vacancy.currency_id "
+            f"HAVING {aggregates['salary_count']} > 0 ORDER BY first_id", parameters).fetchall()
+        keys, currencies = self.get_keys(group), dict(self.connection.execute("SELECT id, code FROM currency"))
+        return [(key if keys is None else keys[key], currencies[currency],
+                 None if month is None else "{0:04d}-{1:02d}".format(year, month), salary, number)
+                for key, currency, year, month, salary, number, _ in rows]
+
+    def get_count(self):
+        """Получает количество вакансий без пустых полей
+
+        Returns:
+            int: Количество вакансий
+        """
+        return self.connection.execute("SELECT COALESCE(SUM(salary_count), 0) FROM summary_year").fetchone()[0]
+
+    def get_means(self, group, vacancy_name=None, regex=True):
+        """Получает средние зарплаты salary_mean и количества всех вакансий по группам, как в 3.2.3.py
+
+        Args:
+            group (str): Группировка: year или area
+            vacancy_name (str): Название профессии, None - все вакансии
+            regex (bool): Название профессии - регулярное выражение, как в str.contains
+        Returns:
+            list: Строки (значение группы, средняя зарплата или None, количество) по возрастанию значения группы
+        """
+        table, aggregates, condition, parameters = self.get_source(group, vacancy_name, regex)
+        column = group_columns[group]
+        rows = self.connection.execute(
+            f"SELECT {column}, {aggregates['salary_mean']}, {aggregates['salary_mean_count']}, "
+            f"{aggregates['number']} FROM {table} {condition} GROUP BY {column} HAVING {column} IS NOT NULL",
+            parameters).fetchall()
+        keys = self.get_keys(group)
+        return sorted((key if keys is None else keys[key], salary / count if count else None, number)
+                      for key, salary, count, number in rows)
+
+    def get_total(self):
+        """Получает количество всех вакансий
+
+        Returns:
+            int: Количество вакансий
+        """
+        return self.connection.execute("SELECT COALESCE(SUM(number), 0) FROM summary_year").fetchone()[0]